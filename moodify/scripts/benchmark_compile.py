@@ -0,0 +1,88 @@
+"""
+Compara a latência por frame do ensemble eager com a versão torch.compile.
+
+Uso (a partir de moodify/):
+    python scripts/benchmark_compile.py
+    python scripts/benchmark_compile.py --random-weights 5   # sem checkpoints
+
+A primeira execução paga a compilação completa; as seguintes reaproveitam o
+cache em MOOD_COMPILE_CACHE_DIR.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.services.MoodDetector import (
+    COMPILE_CACHE_DIR,
+    ENSEMBLE_MODELS_DIR,
+    IMG_SIZE,
+    SEResNet34Improved,
+)
+from src.services.EnsembleEngine import EnsembleEngine
+
+
+def build_models(random_weights: int):
+    models = []
+    if random_weights:
+        for _ in range(random_weights):
+            models.append(SEResNet34Improved(num_classes=7, dropout=0.3).eval().prepare_for_inference())
+        return models
+
+    for model_path in sorted(ENSEMBLE_MODELS_DIR.glob("model_*.pth")):
+        model = SEResNet34Improved(num_classes=7, dropout=0.3)
+        model.load_state_dict(torch.load(str(model_path), map_location="cpu"))
+        models.append(model.prepare_for_inference())
+    if not models:
+        raise SystemExit(f"Nenhum modelo encontrado em {ENSEMBLE_MODELS_DIR} (use --random-weights)")
+    return models
+
+
+def time_per_frame(engine: EnsembleEngine, face_batch: torch.Tensor, runs: int) -> float:
+    engine(face_batch)  # aquecimento
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        engine(face_batch)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000 / face_batch.shape[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--random-weights", type=int, default=0, metavar="N", help="Usa N membros com pesos aleatórios")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--cache-dir", type=Path, default=COMPILE_CACHE_DIR)
+    args = parser.parse_args()
+
+    models = build_models(args.random_weights)
+    sample_shape = (3, IMG_SIZE, IMG_SIZE)
+    print(f"📦 {len(models)} membros, {torch.get_num_threads()} threads")
+
+    engines = {
+        "eager (loop)": EnsembleEngine(models, vectorize=False),
+        "eager (vmap)": EnsembleEngine(models, vectorize=True),
+    }
+    compiled = EnsembleEngine(models, vectorize=False)
+    start = time.perf_counter()
+    if compiled.compile(args.batch_sizes, sample_shape, args.cache_dir):
+        print(f"⏱  Compilação + aquecimento: {time.perf_counter() - start:.1f}s")
+        engines["torch.compile"] = compiled
+
+    for batch_size in args.batch_sizes:
+        face_batch = torch.randn(batch_size, *sample_shape)
+        reference = engines["eager (loop)"](face_batch)
+        print(f"\n📊 Batch {batch_size}")
+        for name, engine in engines.items():
+            diff = np.abs(engine(face_batch) - reference).max()
+            ms = time_per_frame(engine, face_batch, args.runs)
+            print(f"   {name:<14} {ms:8.1f} ms/frame  (dif. máx. {diff:.1e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Mede o custo de import (tempo e RSS) do web tier e do stack de detecção.
+
+Uso (a partir de moodify/):
+    python scripts/benchmark_imports.py --runs 5
+
+Cada medição roda num processo Python novo. "web tier" é o que o servidor paga
+para subir (src.main); "web tier + detecção" inclui o import de MoodDetector,
+que antes era feito em cascata por App -> MoodPage.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+TARGETS = {
+    "web tier": ["src.main"],
+    "web tier + detecção": ["src.main", "src.services.MoodDetector"],
+}
+
+PROBE = """
+import importlib, json, resource, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+for module in {modules!r}:
+    importlib.import_module(module)
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "torch_imported": "torch" in sys.modules,
+    "cv2_imported": "cv2" in sys.modules,
+}}))
+"""
+
+
+def measure(modules, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", PROBE.format(root=str(ROOT), modules=modules)],
+            cwd=str(ROOT),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "seconds": statistics.median(sample["seconds"] for sample in samples),
+        "rss_mb": statistics.median(sample["rss_mb"] for sample in samples),
+        "torch_imported": samples[0]["torch_imported"],
+        "cv2_imported": samples[0]["cv2_imported"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    results = {name: measure(modules, args.runs) for name, modules in TARGETS.items()}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, result in results.items():
+        print(
+            f"{name:<22} {result['seconds']:6.2f}s  {result['rss_mb']:7.1f} MB  "
+            f"torch={'sim' if result['torch_imported'] else 'não'}  cv2={'sim' if result['cv2_imported'] else 'não'}"
+        )
+    web, full = results["web tier"], results["web tier + detecção"]
+    print(f"\n📉 Economia no startup do web tier: {full['seconds'] - web['seconds']:.2f}s, {full['rss_mb'] - web['rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
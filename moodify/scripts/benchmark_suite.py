@@ -0,0 +1,253 @@
+"""
+Benchmarks reprodutíveis dos hot paths da detecção, sem precisar de checkpoints.
+
+Uso (a partir de moodify/):
+    python scripts/benchmark_suite.py --output bench.json
+    python scripts/benchmark_suite.py --members 1 3 5 --batch-sizes 1 4 8 --threads 1 4 \\
+        --resolutions 640x480 1280x720 --frames sessao.mp4 --output bench.json
+    python scripts/benchmark_suite.py --output novo.json --compare bench.json
+
+Os ensembles são SEResNet34Improved com pesos aleatórios (seed fixa), preparados
+como no app (prepare_for_inference e, com MOOD_GRAYSCALE_NATIVE, entrada cinza).
+Mede, para cada combinação da varredura:
+
+    preprocess   FacePreprocessor (resize + normalização)    batch x threads
+    predict      EnsembleEngine (membros + TTA)              engine x membros x batch x threads
+    haar         detectMultiScale no frame inteiro           resolução x threads
+    haar_roi     FaceTracker (frame reduzido + ROI)          resolução x threads
+    end_to_end   Haar + recorte + pré-processamento + ensemble por frame
+                                                             membros x resolução x threads
+
+Os frames sintéticos têm ruído suave com seed fixa; sem face detectada, o
+end_to_end classifica um recorte central, para sempre incluir o ensemble.
+--engines compara, no predict, o loop por modelo (padrão do app para membros
+preparados) com o vmap forçado sobre os mesmos membros. Com --frames (vídeo ou
+pasta de imagens), os mesmos benchmarks rodam também nos frames gravados, redimensionados para cada resolução. O JSON de saída traz a
+mediana e o p90 em ms, o commit e o ambiente; --compare imprime a razão contra
+um resultado anterior.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.services.MoodDetector import GRAYSCALE_INPUT, IMG_SIZE, SEResNet34Improved
+from src.services.EnsembleEngine import EnsembleEngine
+from src.services.FaceTracker import FaceTracker
+from src.services.OfflinePipeline import image_frames, video_frames
+from src.services.Preprocessing import FacePreprocessor
+
+ROOT = Path(__file__).resolve().parent.parent
+CASCADE_FILE = "haarcascade_frontalface_default.xml"
+DEFAULT_THREADS = torch.get_num_threads()
+
+
+def parse_resolution(value: str):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def build_models(members: int, seed: int):
+    torch.manual_seed(seed)
+    models = []
+    for _ in range(members):
+        model = SEResNet34Improved(num_classes=7, dropout=0.3).eval().prepare_for_inference()
+        if GRAYSCALE_INPUT:
+            model.fold_grayscale_input()
+        models.append(model)
+    return models
+
+
+def synthetic_frames(resolution, count: int, seed: int):
+    # Ruído suavizado: textura parecida com imagem real para o Haar, reprodutível
+    rng = np.random.default_rng(seed)
+    width, height = resolution
+    frames = []
+    for _ in range(count):
+        noise = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+        frames.append(cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC))
+    return frames
+
+
+def recorded_frames(path: Path, count: int):
+    source = image_frames(path) if path.is_dir() else video_frames(path)
+    frames = []
+    for _, frame in source:
+        if isinstance(frame, bytes):
+            frame = cv2.imdecode(np.frombuffer(frame, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is not None:
+            frames.append(frame)
+        if len(frames) >= count:
+            break
+    if not frames:
+        raise SystemExit(f"Nenhum frame lido de {path}")
+    return frames
+
+
+def measure(fn, runs: int, warmup: int):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"ms_median": float(np.median(timings)), "ms_p90": float(np.percentile(timings, 90))}
+
+
+def set_threads(threads: int):
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(threads)
+
+
+def environment(args):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "torch_threads_default": DEFAULT_THREADS,
+        "grayscale_input": GRAYSCALE_INPUT,
+        "args": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+    }
+
+
+def run_suite(args):
+    results = []
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + CASCADE_FILE)
+    preprocessor = FacePreprocessor(IMG_SIZE, grayscale=GRAYSCALE_INPUT)
+    rng = np.random.default_rng(args.seed)
+
+    def detect(gray, min_size=None, max_size=None):
+        return cascade.detectMultiScale(gray, 1.2, 5, minSize=min_size or (0, 0), maxSize=max_size or (0, 0))
+
+    def record(bench, **fields):
+        results.append(dict(bench=bench, **fields))
+        params = " ".join(f"{k}={v}" for k, v in fields.items() if not k.startswith("ms_"))
+        print(f"   {bench:<11} {params:<52} {fields['ms_median']:9.2f} ms  (p90 {fields['ms_p90']:.2f})")
+
+    frame_sets = {("synthetic", resolution): synthetic_frames(resolution, args.frames_per_set, args.seed)
+                  for resolution in args.resolutions}
+    if args.frames:
+        recorded = recorded_frames(args.frames, args.frames_per_set)
+        for resolution in args.resolutions:
+            frame_sets[("recorded", resolution)] = [cv2.resize(frame, resolution) for frame in recorded]
+
+    models = {members: build_models(members, args.seed) for members in args.members}
+    # Engine do app (vectorize=None) para o end_to_end; loop/vmap forçados para o predict
+    ensembles = {members: EnsembleEngine(models[members]) for members in args.members}
+    engines = {
+        (engine, members): EnsembleEngine(models[members], vectorize=engine == "vmap")
+        for engine in args.engines for members in args.members
+    }
+    crops = [rng.integers(0, 256, (size, size), dtype=np.uint8) for size in rng.integers(64, 256, max(args.batch_sizes))]
+
+    for threads in args.threads:
+        set_threads(threads)
+        print(f"\n🧵 {threads} thread(s)")
+
+        for batch_size in args.batch_sizes:
+            batch_crops = crops[:batch_size]
+            record("preprocess", threads=threads, batch=batch_size,
+                   **measure(lambda: preprocessor(batch_crops), args.runs, args.warmup))
+
+        for engine_name, members, batch_size in itertools.product(args.engines, args.members, args.batch_sizes):
+            face_batch = preprocessor(crops[:batch_size]).clone()
+            engine = engines[(engine_name, members)]
+            record("predict", threads=threads, engine=engine_name, members=members, batch=batch_size,
+                   **measure(lambda: engine(face_batch), args.runs, args.warmup))
+
+        for (source, resolution), frames in frame_sets.items():
+            grays = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in frames]
+            frame_iter = itertools.cycle(grays)
+            res = f"{resolution[0]}x{resolution[1]}"
+            record("haar", threads=threads, source=source, resolution=res,
+                   **measure(lambda: detect(next(frame_iter)), args.runs, args.warmup))
+
+            tracker = FaceTracker(detect)
+            record("haar_roi", threads=threads, source=source, resolution=res,
+                   **measure(lambda: tracker.update(next(frame_iter)), args.runs, args.warmup))
+
+            for members in args.members:
+                engine = ensembles[members]
+
+                def end_to_end():
+                    frame = next(frame_iter)
+                    faces = detect(frame)
+                    if len(faces) == 0:
+                        height, width = frame.shape[:2]
+                        size = min(height, width) // 2
+                        faces = [((width - size) // 2, (height - size) // 2, size, size)]
+                    engine(preprocessor([frame[y:y+h, x:x+w] for x, y, w, h in faces]))
+
+                record("end_to_end", threads=threads, source=source, resolution=res, members=members,
+                       **measure(end_to_end, args.runs, args.warmup))
+
+    return results
+
+
+def result_key(result):
+    return tuple(sorted((k, v) for k, v in result.items() if not k.startswith("ms_")))
+
+
+def compare(results, baseline_path: Path):
+    baseline = {result_key(r): r for r in json.loads(baseline_path.read_text())["results"]}
+    print(f"\n📊 Comparação com {baseline_path} (razão novo / anterior, < 1 é mais rápido)")
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if previous is None:
+            continue
+        ratio = result["ms_median"] / previous["ms_median"] if previous["ms_median"] else float("inf")
+        params = " ".join(f"{k}={v}" for k, v in result.items() if not k.startswith("ms_") and k != "bench")
+        flag = "⚠" if ratio > 1.1 else " "
+        print(f" {flag} {result['bench']:<11} {params:<52} {ratio:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--engines", nargs="+", choices=["loop", "vmap"], default=["loop", "vmap"],
+                        help="Caminhos do EnsembleEngine medidos no predict")
+    parser.add_argument("--threads", type=int, nargs="+", default=[DEFAULT_THREADS])
+    parser.add_argument("--resolutions", type=parse_resolution, nargs="+", default=[(640, 480), (1280, 720)])
+    parser.add_argument("--frames", type=Path, help="Vídeo ou pasta de imagens com frames gravados")
+    parser.add_argument("--frames-per-set", type=int, default=8, help="Frames usados por conjunto/resolução")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Grava os resultados em JSON")
+    parser.add_argument("--compare", type=Path, help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    print(f"📦 Benchmarks com pesos aleatórios (seed {args.seed}), entrada {'cinza' if GRAYSCALE_INPUT else 'RGB'}")
+    report = {"environment": environment(args), "results": run_suite(args)}
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\n✓ Resultados salvos em {args.output}")
+    if args.compare:
+        compare(report["results"], args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Junta os checkpoints model_*.pth num único arquivo ensemble.pt.
+
+Uso (a partir de moodify/):
+    python scripts/consolidate_ensemble.py
+
+O app passa a carregar ensemble.pt (mapeado em memória) no lugar dos arquivos
+individuais. Apague-o para voltar ao carregamento por arquivo.
+"""
+import sys
+from pathlib import Path
+
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.services.MoodDetector import CONSOLIDATED_ENSEMBLE_FILE, ENSEMBLE_MODELS_DIR
+
+
+def main():
+    model_files = sorted(ENSEMBLE_MODELS_DIR.glob("model_*.pth"))
+    if not model_files:
+        raise SystemExit(f"Nenhum modelo encontrado em {ENSEMBLE_MODELS_DIR}")
+
+    checkpoint = {
+        model_path.name: torch.load(str(model_path), map_location="cpu", weights_only=True)
+        for model_path in model_files
+    }
+    output_path = ENSEMBLE_MODELS_DIR / CONSOLIDATED_ENSEMBLE_FILE
+    torch.save(checkpoint, str(output_path))
+    print(f"✓ {len(checkpoint)} membros salvos em {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Exporta o ensemble para ONNX, para uso com MOOD_ENGINE=onnx.
+
+Uso (a partir de moodify/):
+    python scripts/export_onnx.py                  # um grafo por membro (model_*.onnx)
+    python scripts/export_onnx.py --mode ensemble  # ensemble + TTA num só grafo (ensemble.onnx)
+
+Ao final, compara a saída do ONNX Runtime com o EnsembleEngine (PyTorch eager).
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.services.MoodDetector import (
+    ENSEMBLE_MODELS_DIR,
+    IMG_SIZE,
+    ONNX_ENSEMBLE_FILE,
+    ONNX_MODELS_DIR,
+    SEResNet34Improved,
+)
+from src.services.EnsembleEngine import (
+    ONNX_INPUT_NAME,
+    ONNX_LOGITS_OUTPUT,
+    ONNX_PROBS_OUTPUT,
+    EnsembleEngine,
+    FlipTTAEnsemble,
+    OnnxEnsembleEngine,
+)
+
+
+def export(module: torch.nn.Module, path: Path, output_name: str, opset: int, num_members: int):
+    import onnx
+
+    example = torch.randn(1, 3, IMG_SIZE, IMG_SIZE)
+    torch.onnx.export(
+        module,
+        (example,),
+        str(path),
+        input_names=[ONNX_INPUT_NAME],
+        output_names=[output_name],
+        dynamic_axes={ONNX_INPUT_NAME: {0: "batch"}, output_name: {0: "batch"}},
+        opset_version=opset,
+    )
+
+    model = onnx.load(str(path))
+    entry = model.metadata_props.add()
+    entry.key, entry.value = "num_members", str(num_members)
+    onnx.save(model, str(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["members", "ensemble"], default="members")
+    parser.add_argument("--opset", type=int, default=18)
+    parser.add_argument("--output-dir", type=Path, default=ONNX_MODELS_DIR)
+    args = parser.parse_args()
+
+    models = []
+    for model_path in sorted(ENSEMBLE_MODELS_DIR.glob("model_*.pth")):
+        model = SEResNet34Improved(num_classes=7, dropout=0.3)
+        model.load_state_dict(torch.load(str(model_path), map_location="cpu"))
+        models.append((model_path, model.eval()))
+
+    if not models:
+        raise SystemExit(f"Nenhum modelo encontrado em {ENSEMBLE_MODELS_DIR}")
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    if args.mode == "ensemble":
+        output_path = args.output_dir / ONNX_ENSEMBLE_FILE
+        ensemble = FlipTTAEnsemble([model for _, model in models]).eval()
+        export(ensemble, output_path, ONNX_PROBS_OUTPUT, args.opset, len(models))
+        exported = [output_path]
+        print(f"✓ Ensemble exportado: {output_path}")
+    else:
+        exported = []
+        for model_path, model in models:
+            output_path = args.output_dir / f"{model_path.stem}.onnx"
+            export(model, output_path, ONNX_LOGITS_OUTPUT, args.opset, 1)
+            exported.append(output_path)
+            print(f"✓ {model_path.name} -> {output_path.name}")
+
+    face_batch = torch.randn(4, 3, IMG_SIZE, IMG_SIZE)
+    torch_probs = EnsembleEngine([model for _, model in models])(face_batch)
+    onnx_probs = OnnxEnsembleEngine(exported)(face_batch)
+    print(f"📊 Diferença máxima ONNX Runtime vs PyTorch: {np.abs(torch_probs - onnx_probs).max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
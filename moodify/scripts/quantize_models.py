@@ -0,0 +1,107 @@
+"""
+Quantiza o ensemble em INT8 para CPU e compara com o fp32.
+
+Uso (a partir de moodify/):
+    python scripts/quantize_models.py --calibration-dir caminho/para/faces
+
+A pasta de calibração deve conter recortes de faces (qualquer formato lido pelo
+OpenCV). Os modelos quantizados são salvos em model/ensemble_models2_int8 e
+carregados pelo app com MOOD_QUANTIZED=1.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.services.MoodDetector import (
+    ENSEMBLE_MODELS_DIR,
+    IMG_SIZE,
+    QUANTIZED_MODELS_DIR,
+    SEResNet34Improved,
+)
+from src.services.EnsembleEngine import EnsembleEngine
+from src.services.Preprocessing import FacePreprocessor
+from src.services.Quantization import QUANTIZED_SUFFIX, quantize_model, save_quantized
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+
+def load_faces(directory: Path, limit: int) -> torch.Tensor:
+    paths = sorted(p for p in directory.rglob("*") if p.suffix.lower() in IMAGE_EXTENSIONS)[:limit]
+    faces = [face for face in (cv2.imread(str(path), cv2.IMREAD_GRAYSCALE) for path in paths) if face is not None]
+    if not faces:
+        raise SystemExit(f"Nenhuma imagem encontrada em {directory}")
+    # Modelos quantizados recebem a entrada RGB normalizada (3 canais)
+    return FacePreprocessor(IMG_SIZE)(faces).clone()
+
+
+def time_per_frame(engine: EnsembleEngine, face: torch.Tensor, runs: int) -> float:
+    engine(face)  # aquecimento
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        engine(face)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calibration-dir", type=Path, required=True)
+    parser.add_argument("--eval-dir", type=Path, help="Faces para medir concordância (padrão: as de calibração)")
+    parser.add_argument("--max-images", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--backend", default="x86", choices=["x86", "fbgemm", "qnnpack", "onednn"])
+    parser.add_argument("--runs", type=int, default=20, help="Repetições para medir latência")
+    args = parser.parse_args()
+
+    calibration = load_faces(args.calibration_dir, args.max_images)
+    evaluation = load_faces(args.eval_dir, args.max_images) if args.eval_dir else calibration
+    print(f"🖼  {len(calibration)} faces de calibração, {len(evaluation)} de avaliação")
+
+    QUANTIZED_MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    fp32_models, int8_models = [], []
+
+    for model_path in sorted(ENSEMBLE_MODELS_DIR.glob("model_*.pth")):
+        model = SEResNet34Improved(num_classes=7, dropout=0.3)
+        model.load_state_dict(torch.load(str(model_path), map_location="cpu"))
+        model.eval()
+
+        quantized = quantize_model(model, calibration.split(args.batch_size), backend=args.backend)
+        output_path = QUANTIZED_MODELS_DIR / f"{model_path.stem}{QUANTIZED_SUFFIX}"
+        save_quantized(quantized, output_path, calibration[:1])
+
+        with torch.no_grad():
+            agreement = (model(evaluation).argmax(1) == quantized(evaluation).argmax(1)).float().mean()
+        print(f"✓ {model_path.name} -> {output_path.name} (concordância top-1: {agreement:.1%})")
+
+        fp32_models.append(model)
+        int8_models.append(quantized)
+
+    if not fp32_models:
+        raise SystemExit(f"Nenhum modelo encontrado em {ENSEMBLE_MODELS_DIR}")
+
+    fp32_engine = EnsembleEngine(fp32_models)
+    int8_engine = EnsembleEngine(int8_models, vectorize=False)
+    fp32_probs = np.concatenate([fp32_engine(batch) for batch in evaluation.split(args.batch_size)])
+    int8_probs = np.concatenate([int8_engine(batch) for batch in evaluation.split(args.batch_size)])
+
+    agreement = (fp32_probs.argmax(1) == int8_probs.argmax(1)).mean()
+    max_diff = np.abs(fp32_probs - int8_probs).max()
+    fp32_ms = time_per_frame(fp32_engine, evaluation[:1], args.runs)
+    int8_ms = time_per_frame(int8_engine, evaluation[:1], args.runs)
+
+    print("\n📊 Ensemble completo (com TTA)")
+    print(f"   Concordância top-1 INT8 vs fp32: {agreement:.1%}")
+    print(f"   Diferença máxima de probabilidade: {max_diff:.4f}")
+    print(f"   Latência por frame fp32: {fp32_ms:.1f} ms")
+    print(f"   Latência por frame INT8: {int8_ms:.1f} ms ({fp32_ms / int8_ms:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
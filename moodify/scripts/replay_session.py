@@ -0,0 +1,91 @@
+"""
+Grava sessões de câmera e reproduz o loop de detecção completo sem webcam nem janela.
+
+Uso (a partir de moodify/):
+    python scripts/replay_session.py record sessao.moodrec --seconds 20
+    python scripts/replay_session.py record sessao.moodrec --source video.mp4
+    python scripts/replay_session.py replay sessao.moodrec              # tempo real
+    python scripts/replay_session.py replay sessao.moodrec --max-speed --runs 3
+
+"record" grava os frames (JPEG) com os tempos originais num arquivo .moodrec.
+"replay" passa a sessão por open_camera_and_detect em modo headless (captura,
+rastreamento, ensemble, suavização) e imprime as estatísticas de cada execução,
+para perfilar o loop em containers de CI e servidores. Com --max-speed, a captura
+roda em lockstep com a inferência: todos os frames são processados, sempre os mesmos.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.services.FrameSource import RecordingSource, ReplaySource, open_frame_source
+
+
+def record(args):
+    source = RecordingSource(open_frame_source(args.source), args.output, quality=args.quality)
+    if not source.isOpened():
+        raise SystemExit(f"Não foi possível abrir a fonte: {args.source}")
+    print(f"⏺  Gravando {args.source} em {args.output} por até {args.seconds:.0f}s...")
+    deadline = time.perf_counter() + args.seconds
+    try:
+        while time.perf_counter() < deadline:
+            ok, _ = source.read()
+            if not ok:
+                break
+    finally:
+        source.release()
+    size_mb = args.output.stat().st_size / 1024 / 1024
+    print(f"✓ {source.frames} frames gravados ({size_mb:.1f} MB)")
+
+
+def replay(args):
+    from src.services.MoodDetector import mood_detector
+
+    if not mood_detector.warm_up():
+        raise SystemExit("Detector indisponível: verifique os modelos e o detector de faces.")
+
+    runs = []
+    for run in range(args.runs):
+        source = ReplaySource(args.input, realtime=not args.max_speed)
+        mood_id = mood_detector.open_camera_and_detect(source=source, headless=True, lockstep=args.max_speed)
+        stats = dict(mood_detector.last_session_stats, run=run)
+        stats["capture_fps"] = stats["frames_captured"] / stats["seconds"] if stats["seconds"] else 0.0
+        stats["processed_fps"] = stats["frames_processed"] / stats["seconds"] if stats["seconds"] else 0.0
+        runs.append(stats)
+        print(
+            f"📊 Execução {run + 1}: {stats['frames_captured']} frames em {stats['seconds']:.1f}s, "
+            f"{stats['frames_processed']} processados ({stats['processed_fps']:.1f}/s), "
+            f"{stats['inferences']} inferências, mood={mood_id}"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(runs, indent=2))
+        print(f"✓ Estatísticas salvas em {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Grava uma sessão")
+    record_parser.add_argument("output", type=Path)
+    record_parser.add_argument("--source", default="0", help="Índice da webcam ou arquivo de vídeo (padrão: 0)")
+    record_parser.add_argument("--seconds", type=float, default=30.0)
+    record_parser.add_argument("--quality", type=int, default=85, help="Qualidade JPEG (0-100)")
+    record_parser.set_defaults(handler=record)
+
+    replay_parser = commands.add_parser("replay", help="Reproduz uma sessão no loop de detecção headless")
+    replay_parser.add_argument("input", type=Path)
+    replay_parser.add_argument("--max-speed", action="store_true", help="Ignora os tempos gravados (lockstep)")
+    replay_parser.add_argument("--runs", type=int, default=1)
+    replay_parser.add_argument("--output", type=Path, help="Grava as estatísticas em JSON")
+    replay_parser.set_defaults(handler=replay)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
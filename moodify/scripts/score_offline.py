@@ -0,0 +1,63 @@
+"""
+Pontua um vídeo gravado ou uma pasta de imagens e grava um resultado por frame em JSONL.
+
+Uso (a partir de moodify/):
+    python scripts/score_offline.py sessao.mp4 --output sessao.jsonl --every 2
+    python scripts/score_offline.py caminho/para/dataset --output dataset.jsonl
+
+Os frames passam por um pipeline em estágios (leitura, detecção de faces em
+paralelo, ensemble em batch) com filas limitadas, então a memória é constante
+para qualquer tamanho de entrada. Cada linha do JSONL tem o índice do frame
+(e o timestamp, em vídeos, ou o arquivo, em pastas) mais o resultado de
+detect_images. O arquivo é escrito (e descarregado) à medida que os frames ficam prontos.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.services.MoodDetector import BATCH_MAX_SIZE, FACE_DETECT_WORKERS, mood_detector
+from src.services.OfflinePipeline import OfflinePipeline, image_frames, video_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", type=Path, help="Arquivo de vídeo ou pasta de imagens")
+    parser.add_argument("--output", type=Path, required=True, help="Arquivo JSONL de saída")
+    parser.add_argument("--every", type=int, default=1, help="Pontua um frame a cada N (só vídeos)")
+    parser.add_argument("--workers", type=int, default=FACE_DETECT_WORKERS, help="Threads de detecção de faces")
+    parser.add_argument("--batch-size", type=int, default=BATCH_MAX_SIZE, help="Frames por batch do ensemble")
+    parser.add_argument("--queue-size", type=int, default=32, help="Tamanho das filas entre os estágios")
+    parser.add_argument("--no-probabilities", action="store_true", help="Omite as probabilidades por classe")
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        raise SystemExit(f"Entrada não encontrada: {args.input}")
+    frames = image_frames(args.input) if args.input.is_dir() else video_frames(args.input, args.every)
+    pipeline = OfflinePipeline(mood_detector, args.workers, args.batch_size, args.queue_size)
+
+    scored = faces = 0
+    start = None
+    with args.output.open("w", encoding="utf-8") as output:
+        for result in pipeline.run(frames):
+            if start is None:
+                # Não conta a carga/aquecimento dos modelos na vazão
+                start = time.perf_counter()
+            if args.no_probabilities:
+                result.pop("probabilities", None)
+                for face in result.get("faces", []):
+                    face.pop("probabilities", None)
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+            scored += 1
+            faces += len(result.get("faces", []))
+
+    elapsed = time.perf_counter() - start if start is not None else 0.0
+    fps = scored / elapsed if elapsed > 0 else 0.0
+    print(f"\n📊 {scored} frames, {faces} faces em {elapsed:.1f}s ({fps:.1f} frames/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
-from reactpy import component, html, use_state
+import asyncio
+import threading
+from reactpy import component, html, use_ref, use_state
 from typing import Dict, Any, Callable, Optional, List
 from ...services.api import api_client
-from ...services.MoodDetector import mood_detector
+from ...services.LazyDetector import get_mood_detector
 
 MOOD_OPTIONS: List[Dict[str, str]] = [
     {"value": "happy", "label": "Feliz", "description": "Energético, dançante e alto astral."},
@@ -24,6 +26,8 @@ def MoodPage(
     submitting, set_submitting = use_state(False)
     error_message, set_error_message = use_state("")
     success_message, set_success_message = use_state("")
+    detecting, set_detecting = use_state(False)
+    cancel_detection = use_ref(None)
 
     state_token = auth.get("state_token", "")
     user_info = auth.get("user_info", {})
@@ -39,14 +43,28 @@ def MoodPage(
     async def handle_detect_mood(event):
         set_error_message("")
         set_success_message("")
-        
+        set_detecting(True)
+
+        cancel_event = threading.Event()
+        cancel_detection.current = cancel_event
         try:
-            detected = mood_detector.open_camera_and_detect()
+            # O primeiro uso importa torch/cv2: fora do event loop
+            mood_detector = await asyncio.get_running_loop().run_in_executor(None, get_mood_detector)
+            detected = await mood_detector.detect_async(cancel_event=cancel_event)
             if detected:
                 set_selected_mood(detected)
                 set_success_message(f"Mood detectado com sucesso!")
+        except asyncio.TimeoutError:
+            set_error_message("Tempo esgotado na detecção de emoção.")
         except Exception as e:
             set_error_message(f"Erro na câmera: {str(e)}")
+        finally:
+            cancel_detection.current = None
+            set_detecting(False)
+
+    def handle_cancel_detect(event):
+        if cancel_detection.current is not None:
+            cancel_detection.current.set()
 
     async def handle_submit(event):
         if not state_token:
@@ -82,11 +100,11 @@ def MoodPage(
             html.button(
                 {
                     "class_name": "btn btn-secondary",
-                    "on_click": handle_detect_mood,
+                    "on_click": handle_cancel_detect if detecting else handle_detect_mood,
                     "disabled": submitting,
                     "style": {"margin-bottom": "1rem", "width": "100%"}
                 },
-                "📷 Detectar Emoção com Câmera"
+                "⏹ Cancelar detecção" if detecting else "📷 Detectar Emoção com Câmera"
             ),
             html.label({"for": "mood-selector"}, "Selecione um mood"),
             html.select(
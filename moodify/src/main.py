@@ -9,6 +9,11 @@ from dotenv import load_dotenv
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.App import App
+from src.routes.mood_stream import mood_stream
+from src.routes.mood_batch import detect_mood_batch
+from src.routes.health import readiness
+from src.routes.metrics import metrics
+from src.services.LazyDetector import start_background_warm_up
 
 load_dotenv()
 
@@ -25,6 +30,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_websocket_route("/ws/mood", mood_stream)
+app.add_route("/api/mood/batch", detect_mood_batch, methods=["POST"])
+app.add_route("/ready", readiness, methods=["GET"])
+app.add_route("/metrics", metrics, methods=["GET"])
+
+if os.getenv("MOOD_WARMUP", "1") == "1":
+    # Carrega e aquece o ensemble em background assim que o servidor sobe
+    app.add_event_handler("startup", start_background_warm_up)
+
 configure(app, App, options=Options(url_prefix=""))
 
 if __name__ == "__main__":
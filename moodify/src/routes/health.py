@@ -0,0 +1,13 @@
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from ..services.LazyDetector import readiness as detector_readiness
+
+
+async def readiness(request: Request):
+    """
+    GET /ready: 200 quando o ensemble está carregado (e aquecido, se o aquecimento
+    estiver em andamento), 503 enquanto não. O corpo traz o progresso da carga por
+    modelo e, em warmed_up, se o aquecimento já rodou.
+    """
+    status = detector_readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
@@ -0,0 +1,12 @@
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from ..services.Metrics import REGISTRY
+
+
+async def metrics(request: Request):
+    """
+    GET /metrics: latências por estágio (histogramas) e contadores da detecção, no
+    formato texto do Prometheus. Não importa o stack de detecção: antes do primeiro
+    uso, os histogramas aparecem zerados.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,43 @@
+import os
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from ..services.LazyDetector import get_mood_detector
+
+BATCH_MAX_IMAGES = int(os.getenv("MOOD_BATCH_MAX_IMAGES", "64"))
+
+
+async def detect_mood_batch(request: Request):
+    """
+    POST /api/mood/batch: recebe várias imagens (multipart, campo "images")
+    e retorna o mood de cada uma, na mesma ordem do envio.
+    """
+    form = await request.form()
+    uploads = form.getlist("images")
+    if not uploads:
+        return JSONResponse(
+            {"success": False, "message": "Envie ao menos uma imagem no campo 'images'."},
+            status_code=400,
+        )
+    if len(uploads) > BATCH_MAX_IMAGES:
+        return JSONResponse(
+            {"success": False, "message": f"Máximo de {BATCH_MAX_IMAGES} imagens por requisição."},
+            status_code=413,
+        )
+
+    if not all(isinstance(upload, UploadFile) for upload in uploads):
+        return JSONResponse(
+            {"success": False, "message": "O campo 'images' deve conter apenas arquivos."},
+            status_code=400,
+        )
+
+    images = [await upload.read() for upload in uploads]
+    # O import do detector (primeiro uso) também fica fora do event loop
+    results = await run_in_threadpool(lambda: get_mood_detector().detect_images(images))
+
+    for index, (upload, result) in enumerate(zip(uploads, results)):
+        result["index"] = index
+        result["filename"] = upload.filename
+
+    return JSONResponse({"success": True, "data": {"results": results}})
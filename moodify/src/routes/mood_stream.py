@@ -0,0 +1,105 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from starlette.websockets import WebSocket, WebSocketDisconnect
+from ..services.LazyDetector import get_mood_detector
+from ..services.Metrics import FRAMES_DROPPED_WEBSOCKET
+
+STREAM_WORKERS = int(os.getenv("MOOD_STREAM_WORKERS", "2"))
+
+# Pool compartilhado por todas as conexões: decodificação + Haar + ensemble
+_frame_pool = ThreadPoolExecutor(max_workers=STREAM_WORKERS, thread_name_prefix="mood-stream")
+
+
+class LatestFrameSlot:
+    """
+    Guarda apenas o frame mais recente de uma conexão.
+    Frames que chegam enquanto a inferência anterior roda substituem o pendente
+    (contados em dropped), então a fila nunca cresce além de um item.
+    """
+
+    def __init__(self):
+        self._frame: Optional[Tuple[int, bytes]] = None
+        self._event = asyncio.Event()
+        self._closed = False
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, data: bytes):
+        if self._frame is not None:
+            self.dropped += 1
+            FRAMES_DROPPED_WEBSOCKET.inc()
+        self.received += 1
+        self._frame = (self.received, data)
+        self._event.set()
+
+    def close(self):
+        self._closed = True
+        self._event.set()
+
+    async def take(self) -> Optional[Tuple[int, bytes]]:
+        while self._frame is None:
+            if self._closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        frame, self._frame = self._frame, None
+        return frame
+
+
+def _process_frame(data: bytes, session: Dict[str, Any]) -> Dict[str, Any]:
+    mood_detector = get_mood_detector()
+    # Suavização e cache de resultados por conexão (criados no worker, junto com o
+    # import do detector)
+    if session.get("smoother") is None:
+        session["smoother"] = mood_detector.create_smoother()
+        session["result_cache"] = mood_detector.create_result_cache()
+    frame = mood_detector.decode_frame(data)
+    if frame is None:
+        return {"face": False, "error": "invalid_frame"}
+    return mood_detector.detect_frame(frame, session["smoother"], session["result_cache"])
+
+
+async def _receive_frames(websocket: WebSocket, slot: LatestFrameSlot):
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            data = message.get("bytes")
+            if data:
+                slot.put(data)
+    finally:
+        slot.close()
+
+
+async def mood_stream(websocket: WebSocket):
+    """
+    WebSocket /ws/mood: o navegador envia frames comprimidos (mensagens binárias)
+    e recebe, para cada frame processado, um JSON com mood e confiança, além do mood
+    suavizado entre os frames da conexão ("smoothed", com "stable" e "stability").
+    """
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+    slot = LatestFrameSlot()
+    session: Dict[str, Any] = {}
+    receiver = asyncio.create_task(_receive_frames(websocket, slot))
+
+    try:
+        while True:
+            item = await slot.take()
+            if item is None:
+                break
+            frame_id, data = item
+            try:
+                result = await loop.run_in_executor(_frame_pool, _process_frame, data, session)
+            except Exception as e:
+                result = {"face": False, "error": str(e)}
+            result["frame"] = frame_id
+            result["dropped"] = slot.dropped
+            await websocket.send_json(result)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
@@ -0,0 +1,108 @@
+import queue
+import threading
+import time
+import torch
+import numpy as np
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+##################################
+# MICRO-BATCHING DE INFERÊNCIA
+##################################
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Fila compartilhada entre sessões na frente do ensemble.
+
+    Cada chamada a submit() enfileira um tensor (n, C, H, W) e recebe um Future.
+    Uma thread dedicada junta os pedidos pendentes e executa um único batch quando
+    atinge max_batch_size ou quando o prazo max_wait_ms do primeiro pedido expira.
+    Cada Future recebe de volta apenas as suas n linhas de probabilidades. Um pedido
+    com mais de max_batch_size linhas é executado em partes de max_batch_size, para
+    o pico de memória do ensemble não crescer com o tamanho do pedido.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[torch.Tensor], np.ndarray],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+    ):
+        self._predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pending: Optional[Tuple[torch.Tensor, Future]] = None
+        self._thread = threading.Thread(target=self._run, name="mood-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, face_batch: torch.Tensor) -> Future:
+        future: Future = Future()
+        self._queue.put((face_batch, future))
+        return future
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _next_item(self, timeout: Optional[float] = None):
+        # Um pedido que não coube no batch anterior tem prioridade
+        if self._pending is not None:
+            item, self._pending = self._pending, None
+            return item
+        return self._queue.get(timeout=timeout)
+
+    def _run(self):
+        while True:
+            item = self._next_item()
+            if item is _STOP:
+                return
+
+            batch = [item]
+            rows = item[0].shape[0]
+            stop = False
+            deadline = time.monotonic() + self.max_wait
+
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._next_item(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                if rows + item[0].shape[0] > self.max_batch_size:
+                    self._pending = item
+                    break
+                batch.append(item)
+                rows += item[0].shape[0]
+
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch: List[Tuple[torch.Tensor, Future]]):
+        # Descarta pedidos cancelados antes de gastar CPU com eles
+        batch = [(tensor, future) for tensor, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            face_batch = torch.cat([tensor for tensor, _ in batch])
+            probs = np.concatenate([self._predict_fn(chunk) for chunk in face_batch.split(self.max_batch_size)])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        start = 0
+        for tensor, future in batch:
+            end = start + tensor.shape[0]
+            future.set_result(probs[start:end])
+            start = end
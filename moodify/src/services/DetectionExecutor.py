@@ -0,0 +1,54 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+##################################
+# EXECUTOR DE DETECÇÃO (FORA DO EVENT LOOP)
+##################################
+
+
+class DetectionExecutor:
+    """
+    Roda detecções bloqueantes (captura + inferência) num pool de threads limitado,
+    expondo uma API awaitable com timeout e cancelamento cooperativo.
+
+    A função executada recebe um threading.Event que é sinalizado quando o chamador
+    cancela ou o timeout expira; o loop de captura deve checá-lo e encerrar.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="mood-detect"
+        )
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+
+    async def run(
+        self,
+        fn: Callable[[threading.Event], Any],
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Any:
+        # Não enfileira além do tamanho do pool: cada detecção segura uma câmera/worker
+        if not self._slots.acquire(blocking=False):
+            raise RuntimeError("Todos os workers de detecção estão ocupados. Tente novamente.")
+
+        cancel_event = cancel_event or threading.Event()
+        loop = asyncio.get_running_loop()
+
+        def job():
+            try:
+                return fn(cancel_event)
+            finally:
+                self._slots.release()
+
+        future = loop.run_in_executor(self._executor, job)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            cancel_event.set()
+            raise
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,296 @@
+import copy
+import os
+import time
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+import numpy as np
+from pathlib import Path
+from typing import List, Optional, Sequence
+from .Metrics import CASCADE_MEMBERS_USED, ENSEMBLE_SECONDS, MODEL_FORWARD_SECONDS, TTA_SECONDS
+
+##################################
+# ENGINE DO ENSEMBLE (FUSED)
+##################################
+
+class EnsembleEngine:
+    """
+    Executa todos os membros do ensemble + TTA (flip) em uma única chamada vetorizada.
+
+    Os parâmetros e buffers dos modelos são empilhados (torch.func.stack_module_state)
+    e o forward é mapeado com vmap sobre a dimensão dos membros. As duas views do TTA
+    (normal + flip) vão juntas como um batch de 2*B.
+
+    Com vectorize=None (padrão), o vmap só é usado se os membros não passaram por
+    prepare_for_inference: channels_last e a escala in-place do SE não têm regra de
+    batching no vmap (fallback lento para aten::as_strided_), e o loop por modelo
+    fica mais rápido. vectorize=True/False força um dos caminhos.
+    """
+
+    def __init__(self, models: List[nn.Module], vectorize: Optional[bool] = None):
+        self.num_members = len(models)
+        self._models = models
+        self._vectorized = False
+        self._compiled = None
+        self._forward_seconds = [MODEL_FORWARD_SECONDS(str(index)) for index in range(self.num_members)]
+        self._all_forward_seconds = MODEL_FORWARD_SECONDS("all")
+
+        if vectorize is None:
+            vectorize = not any(getattr(model, "channels_last", False) for model in models)
+        if not vectorize:
+            return
+
+        try:
+            from torch.func import stack_module_state, functional_call, vmap
+
+            params, buffers = stack_module_state(models)
+            # Módulo "esqueleto" sem memória, usado só para o functional_call
+            base = copy.deepcopy(models[0]).to("meta")
+
+            def member_forward(p, b, x):
+                return functional_call(base, (p, b), (x,))
+
+            self._params = params
+            self._buffers = buffers
+            self._forward = vmap(member_forward, in_dims=(0, 0, None))
+            self._vectorized = True
+        except Exception as e:
+            print(f"⚠ Engine vetorizada indisponível, usando loop por modelo: {e}")
+
+    def _logits(self, x: torch.Tensor) -> torch.Tensor:
+        # Retorna logits com shape (membros, 2*B, classes)
+        if self._vectorized:
+            try:
+                start = time.perf_counter()
+                logits = self._forward(self._params, self._buffers, x)
+                self._all_forward_seconds.observe(time.perf_counter() - start)
+                return logits
+            except Exception as e:
+                print(f"⚠ Falha no forward vetorizado, voltando ao loop por modelo: {e}")
+                self._vectorized = False
+        logits = []
+        for model, forward_seconds in zip(self._models, self._forward_seconds):
+            start = time.perf_counter()
+            logits.append(model(x))
+            forward_seconds.observe(time.perf_counter() - start)
+        return torch.stack(logits)
+
+    def compile(self, batch_sizes: Sequence[int], sample_shape: Sequence[int], cache_dir: Path) -> bool:
+        """
+        Compila ensemble + TTA com torch.compile (inductor) e aquece os batch sizes usados.
+        Os artefatos ficam em cache_dir (FX graph cache), então reinícios reaproveitam a
+        compilação. Se algo falhar, mantém o caminho eager e retorna False.
+        """
+        os.environ["TORCHINDUCTOR_CACHE_DIR"] = str(cache_dir)
+        device = next(self._models[0].parameters()).device
+        start = time.perf_counter()
+        try:
+            import torch._inductor.config as inductor_config
+
+            inductor_config.fx_graph_cache = True
+            compiled = torch.compile(FlipTTAEnsemble(self._models).eval())
+            with torch.no_grad():
+                for batch_size in batch_sizes:
+                    compiled(torch.zeros(batch_size, *sample_shape, device=device))
+        except Exception as e:
+            print(f"⚠ torch.compile falhou, mantendo engine eager: {e}")
+            return False
+
+        self._compiled = compiled
+        print(f"✓ Ensemble compilado (batches {list(batch_sizes)}) em {time.perf_counter() - start:.1f}s")
+        return True
+
+    def __call__(self, face_batch: torch.Tensor) -> np.ndarray:
+        """
+        Recebe um batch (B, C, H, W) e retorna as probabilidades médias (B, classes).
+        """
+        start = time.perf_counter()
+        if self._compiled is not None:
+            try:
+                with torch.no_grad():
+                    probs = self._compiled(face_batch).cpu().numpy()
+                ENSEMBLE_SECONDS.observe(time.perf_counter() - start)
+                return probs
+            except Exception as e:
+                print(f"⚠ Falha no ensemble compilado, voltando ao eager: {e}")
+                self._compiled = None
+
+        batch_size = face_batch.shape[0]
+        with torch.no_grad():
+            tta_batch = torch.cat([face_batch, torch.flip(face_batch, dims=[3])])
+            forward_start = time.perf_counter()
+            logits = self._logits(tta_batch)
+            forward_end = time.perf_counter()
+            probs = F.softmax(logits, dim=-1)
+            # (membros, 2, B, classes) -> média sobre membros e views do TTA
+            probs = probs.view(self.num_members, 2, batch_size, -1).mean(dim=(0, 1)).cpu().numpy()
+        end = time.perf_counter()
+        TTA_SECONDS.observe((forward_start - start) + (end - forward_end))
+        ENSEMBLE_SECONDS.observe(end - start)
+        return probs
+
+
+class CascadeEnsembleEngine:
+    """
+    Ensemble com saída antecipada: avalia os membros em ordem fixa (com TTA) e, para
+    cada face, para assim que a média acumulada tem margem top-1 - top-2 maior ou
+    igual a margin_threshold (depois de pelo menos min_members). Faces ambíguas
+    seguem até o último membro, com o mesmo resultado do EnsembleEngine.
+
+    O número de membros usados por face é contabilizado em stats() e no histograma
+    mood_cascade_members_used do /metrics.
+    """
+
+    def __init__(self, models: List[nn.Module], margin_threshold: float, min_members: int = 1):
+        self.num_members = len(models)
+        self._models = models
+        self.margin_threshold = margin_threshold
+        self.min_members = max(1, min(min_members, self.num_members))
+        # exits[k - 1] = faces que pararam depois de k membros
+        self.exits = [0] * self.num_members
+        self._forward_seconds = [MODEL_FORWARD_SECONDS(str(index)) for index in range(self.num_members)]
+
+    def __call__(self, face_batch: torch.Tensor) -> np.ndarray:
+        """
+        Recebe um batch (B, C, H, W) e retorna as probabilidades médias (B, classes)
+        dos membros que cada face usou.
+        """
+        start = time.perf_counter()
+        forward_total = 0.0
+        batch_size = face_batch.shape[0]
+        active = torch.arange(batch_size, device=face_batch.device)
+        used = torch.zeros(batch_size, dtype=torch.long, device=face_batch.device)
+        totals = None
+
+        with torch.no_grad():
+            for members, model in enumerate(self._models, start=1):
+                faces = face_batch[active]
+                tta_batch = torch.cat([faces, torch.flip(faces, dims=[3])])
+                forward_start = time.perf_counter()
+                logits = model(tta_batch)
+                forward_seconds = time.perf_counter() - forward_start
+                self._forward_seconds[members - 1].observe(forward_seconds)
+                forward_total += forward_seconds
+                probs = F.softmax(logits, dim=-1)
+                # Soma das duas views do TTA
+                probs = probs.view(2, faces.shape[0], -1).sum(dim=0)
+                if totals is None:
+                    totals = torch.zeros(batch_size, probs.shape[1], device=probs.device)
+                totals[active] += probs
+                used[active] = members
+
+                if members < self.min_members or members == self.num_members:
+                    continue
+                top2 = (totals[active] / (2 * members)).topk(2, dim=1).values
+                active = active[(top2[:, 0] - top2[:, 1]) < self.margin_threshold]
+                if active.numel() == 0:
+                    break
+
+            probs = totals / (2 * used).unsqueeze(1)
+
+        for members in used.tolist():
+            self.exits[members - 1] += 1
+            CASCADE_MEMBERS_USED.observe(members)
+        probs = probs.cpu().numpy()
+        elapsed = time.perf_counter() - start
+        TTA_SECONDS.observe(elapsed - forward_total)
+        ENSEMBLE_SECONDS.observe(elapsed)
+        return probs
+
+    def stats(self):
+        faces = sum(self.exits)
+        mean = sum(k * count for k, count in enumerate(self.exits, start=1)) / faces if faces else 0.0
+        return {
+            "faces": faces,
+            "mean_members_used": mean,
+            "members_used": {str(k): count for k, count in enumerate(self.exits, start=1)},
+        }
+
+
+class FlipTTAEnsemble(nn.Module):
+    """
+    Ensemble + TTA (flip) como um único nn.Module, com a mesma saída do EnsembleEngine.
+    Usado para exportar o ensemble inteiro como um só grafo (ONNX).
+    """
+
+    def __init__(self, models: List[nn.Module]):
+        super().__init__()
+        self.members = nn.ModuleList(models)
+
+    def forward(self, x):
+        tta_batch = torch.cat([x, torch.flip(x, dims=[3])])
+        probs = torch.stack([F.softmax(member(tta_batch), dim=-1) for member in self.members])
+        return probs.view(len(self.members), 2, x.shape[0], -1).mean(dim=(0, 1))
+
+
+##################################
+# ENGINE ONNX RUNTIME
+##################################
+
+ONNX_INPUT_NAME = "input"
+ONNX_LOGITS_OUTPUT = "logits"
+ONNX_PROBS_OUTPUT = "probs"
+
+
+class OnnxEnsembleEngine:
+    """
+    Executa o ensemble exportado em ONNX via ONNX Runtime (CPU).
+
+    Aceita um único grafo com o ensemble + TTA (saída "probs") ou um grafo por
+    membro (saída "logits"); neste caso o TTA e a média são feitos aqui, com o
+    mesmo resultado do EnsembleEngine.
+    """
+
+    def __init__(self, model_paths: List[Path], intra_op_threads: int = 0, inter_op_threads: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        if inter_op_threads > 1:
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+        self._sessions = [
+            ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+            for path in model_paths
+        ]
+        output_name = self._sessions[0].get_outputs()[0].name
+        self._fused = output_name == ONNX_PROBS_OUTPUT
+        self.num_members = (
+            int(self._sessions[0].get_modelmeta().custom_metadata_map.get("num_members", 1))
+            if self._fused
+            else len(self._sessions)
+        )
+        self._forward_seconds = [MODEL_FORWARD_SECONDS(str(index)) for index in range(len(self._sessions))]
+        self._all_forward_seconds = MODEL_FORWARD_SECONDS("all")
+
+    def __call__(self, face_batch: torch.Tensor) -> np.ndarray:
+        start = time.perf_counter()
+        x = face_batch.detach().cpu().numpy()
+        if self._fused:
+            probs = self._sessions[0].run(None, {ONNX_INPUT_NAME: x})[0]
+            elapsed = time.perf_counter() - start
+            self._all_forward_seconds.observe(elapsed)
+            ENSEMBLE_SECONDS.observe(elapsed)
+            return probs
+
+        batch_size = x.shape[0]
+        tta_batch = np.ascontiguousarray(np.concatenate([x, x[..., ::-1]]))
+        forward_total = 0.0
+        logits = []
+        for session, forward_seconds in zip(self._sessions, self._forward_seconds):
+            forward_start = time.perf_counter()
+            logits.append(session.run(None, {ONNX_INPUT_NAME: tta_batch})[0])
+            elapsed = time.perf_counter() - forward_start
+            forward_seconds.observe(elapsed)
+            forward_total += elapsed
+        logits = np.stack(logits)
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=-1, keepdims=True)
+        probs = probs.reshape(len(self._sessions), 2, batch_size, -1).mean(axis=(0, 1))
+        elapsed = time.perf_counter() - start
+        TTA_SECONDS.observe(elapsed - forward_total)
+        ENSEMBLE_SECONDS.observe(elapsed)
+        return probs
@@ -0,0 +1,114 @@
+import cv2
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+
+##################################
+# RASTREAMENTO DE FACES ENTRE DETECÇÕES
+##################################
+
+Box = List[int]
+# detect_fn(gray, min_size, max_size) -> caixas (x, y, w, h), como detectMultiScale
+DetectFn = Callable[[np.ndarray, Optional[Tuple[int, int]], Optional[Tuple[int, int]]], np.ndarray]
+
+
+def _iou(a: Box, b: Box) -> float:
+    ax2, ay2 = a[0] + a[2], a[1] + a[3]
+    bx2, by2 = b[0] + b[2], b[1] + b[3]
+    inter_w = min(ax2, bx2) - max(a[0], b[0])
+    inter_h = min(ay2, by2) - max(a[1], b[1])
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    return inter / float(a[2] * a[3] + b[2] * b[3] - inter)
+
+
+class FaceTracker:
+    """
+    Segue as caixas das faces de um vídeo sem rodar o Haar no frame inteiro.
+
+    O cascade roda numa cópia reduzida do frame (largura downscale_width) e, com
+    faces já rastreadas, só dentro de uma ROI expandida (roi_margin) em volta de
+    cada caixa, com minSize/maxSize próximos do tamanho anterior. Se alguma face é
+    perdida, ou a cada full_search_every frames (para achar quem entrou na cena),
+    volta para a busca no frame inteiro. As caixas retornadas estão nas
+    coordenadas do frame original, maiores primeiro.
+    """
+
+    def __init__(
+        self,
+        detect_fn: DetectFn,
+        downscale_width: int = 320,
+        roi_margin: float = 0.5,
+        full_search_every: int = 30,
+        max_faces: int = 8,
+    ):
+        self._detect_fn = detect_fn
+        self.downscale_width = downscale_width
+        self.roi_margin = roi_margin
+        self.full_search_every = full_search_every
+        self.max_faces = max_faces
+        self._tracks: List[Box] = []  # no espaço reduzido
+        self._scale = 1.0
+        self._frames_since_full = 0
+        self.full_searches = 0
+        self.roi_searches = 0
+
+    @property
+    def boxes(self) -> List[Box]:
+        return [self._to_original(box) for box in self._tracks]
+
+    def reset(self):
+        self._tracks = []
+        self._frames_since_full = 0
+
+    def update(self, gray: np.ndarray) -> List[Box]:
+        """Atualiza o rastreamento com um frame em grayscale e retorna as caixas."""
+        small = self._downscale(gray)
+
+        if self._tracks and self._frames_since_full < self.full_search_every:
+            tracks = self._search_rois(small)
+            if tracks is not None:
+                self._tracks = tracks
+                self._frames_since_full += 1
+                return self.boxes
+
+        # Sem rastreamento (ou perdido): busca no frame inteiro
+        faces = self._detect_fn(small, None, None)
+        boxes = sorted(([int(v) for v in face] for face in faces), key=lambda b: b[2] * b[3], reverse=True)
+        self._tracks = boxes[:self.max_faces]
+        self._frames_since_full = 0
+        self.full_searches += 1
+        return self.boxes
+
+    def _downscale(self, gray: np.ndarray) -> np.ndarray:
+        width = gray.shape[1]
+        if not self.downscale_width or width <= self.downscale_width:
+            self._scale = 1.0
+            return gray
+        self._scale = width / float(self.downscale_width)
+        height = int(round(gray.shape[0] / self._scale))
+        return cv2.resize(gray, (self.downscale_width, height), interpolation=cv2.INTER_AREA)
+
+    def _to_original(self, box: Box) -> Box:
+        return [int(round(v * self._scale)) for v in box]
+
+    def _search_rois(self, small: np.ndarray) -> Optional[List[Box]]:
+        # Retorna None se alguma face rastreada não for reencontrada na sua ROI
+        height, width = small.shape[:2]
+        tracks = []
+        for x, y, w, h in self._tracks:
+            margin_x, margin_y = int(w * self.roi_margin), int(h * self.roi_margin)
+            x0, y0 = max(0, x - margin_x), max(0, y - margin_y)
+            x1, y1 = min(width, x + w + margin_x), min(height, y + h + margin_y)
+            size = max(w, h)
+            faces = self._detect_fn(
+                small[y0:y1, x0:x1],
+                (int(size * 0.7), int(size * 0.7)),
+                (int(size * 1.4), int(size * 1.4)),
+            )
+            self.roi_searches += 1
+            if len(faces) == 0:
+                return None
+            candidates = [[int(fx) + x0, int(fy) + y0, int(fw), int(fh)] for fx, fy, fw, fh in faces]
+            tracks.append(max(candidates, key=lambda c: _iou(c, [x, y, w, h])))
+        return sorted(tracks, key=lambda b: b[2] * b[3], reverse=True)
@@ -0,0 +1,150 @@
+import math
+import threading
+import time
+from typing import Any, Optional, Tuple
+from .FrameSource import FrameSource
+from .Metrics import CAPTURE_SECONDS, FRAMES_DROPPED_CAMERA
+
+##################################
+# PIPELINE DE FRAMES DA CÂMERA
+##################################
+
+
+class LatestFrameBuffer:
+    """
+    Guarda só o frame mais recente de uma fonte de vídeo, com um número de sequência.
+    Quem consome sempre pega o frame mais novo; os que foram sobrescritos antes de
+    serem tomados (get_newer com take=True) são contados em dropped. Seguro entre
+    threads.
+
+    Com lockstep=True, put() espera o frame anterior ser tomado antes de publicar o
+    próximo: nenhum frame é descartado e o produtor anda no ritmo do consumidor
+    (replay na velocidade máxima, com os mesmos frames processados a cada execução).
+    """
+
+    def __init__(self, lockstep: bool = False):
+        self._condition = threading.Condition()
+        self._frame: Any = None
+        self._timestamp = 0.0
+        self._closed = False
+        self.lockstep = lockstep
+        self.seq = 0
+        self.dropped = 0
+        self._last_taken = 0
+
+    def put(self, frame, timestamp: Optional[float] = None):
+        with self._condition:
+            if self.lockstep:
+                self._condition.wait_for(lambda: self._last_taken >= self.seq or self._closed)
+                if self._closed:
+                    return
+            if self.seq > self._last_taken:
+                self.dropped += 1
+                FRAMES_DROPPED_CAMERA.inc()
+            self.seq += 1
+            self._frame = frame
+            self._timestamp = time.perf_counter() if timestamp is None else timestamp
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def get_newer(
+        self, after_seq: int, timeout: Optional[float] = None, take: bool = True
+    ) -> Optional[Tuple[int, Any, float]]:
+        """
+        Espera um frame com sequência maior que after_seq e retorna (seq, frame, timestamp).
+        Retorna None se a fonte foi fechada ou se o timeout expirou. Com take=False
+        (ex.: exibição), o frame é lido sem contar como processado.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.seq > after_seq or self._closed, timeout):
+                return None
+            if self.seq <= after_seq:
+                return None
+            if take and self.seq > self._last_taken:
+                self._last_taken = self.seq
+                self._condition.notify_all()
+            return self.seq, self._frame, self._timestamp
+
+
+class CaptureThread:
+    """
+    Lê uma fonte de vídeo (read() -> (ok, frame)) numa thread e publica no buffer.
+    Com um buffer em lockstep, os frames levam o tempo gravado da fonte (ver
+    FrameSource.timestamp), quando existe, em vez do relógio da captura.
+    """
+
+    def __init__(self, capture, buffer: Optional[LatestFrameBuffer] = None):
+        self._capture = capture
+        self.buffer = buffer or LatestFrameBuffer()
+        self._recorded_time = self.buffer.lockstep and isinstance(capture, FrameSource)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mood-capture", daemon=True)
+
+    def start(self) -> "CaptureThread":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        # Libera um put() bloqueado esperando o consumidor (lockstep)
+        self.buffer.close()
+        self._thread.join(timeout=2)
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                ok, frame = self._capture.read()
+                CAPTURE_SECONDS.observe(time.perf_counter() - start)
+                if not ok or self.buffer.closed:
+                    break
+                self.buffer.put(frame, self._capture.timestamp() if self._recorded_time else None)
+        finally:
+            self.buffer.close()
+
+
+class AdaptiveSkipPolicy:
+    """
+    Decide de quantos em quantos frames rodar a inferência a partir das latências medidas.
+
+    Mantém médias móveis (EMA) do intervalo entre frames da câmera e da latência da
+    inferência; a inferência roda a cada ceil(latência / (budget * intervalo)) frames,
+    limitado a [1, max_skip]. Em máquinas rápidas classifica todo frame; em lentas,
+    espaça as inferências para a exibição não acumular atraso.
+    """
+
+    def __init__(self, budget: float = 0.5, alpha: float = 0.2, max_skip: int = 15, initial_skip: int = 3):
+        self.budget = budget
+        self.alpha = alpha
+        self.max_skip = max_skip
+        self._initial_skip = initial_skip
+        self.frame_interval: Optional[float] = None
+        self.inference_latency: Optional[float] = None
+
+    def _ema(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else current + self.alpha * (sample - current)
+
+    def record_frame_interval(self, seconds: float):
+        if seconds > 0:
+            self.frame_interval = self._ema(self.frame_interval, seconds)
+
+    def record_inference(self, seconds: float):
+        self.inference_latency = self._ema(self.inference_latency, seconds)
+
+    @property
+    def skip(self) -> int:
+        if self.frame_interval is None or self.inference_latency is None:
+            return self._initial_skip
+        frames = math.ceil(self.inference_latency / (self.budget * self.frame_interval))
+        return max(1, min(self.max_skip, frames))
+
+    def should_run(self, frames_since_last: int) -> bool:
+        return frames_since_last >= self.skip
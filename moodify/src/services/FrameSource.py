@@ -0,0 +1,175 @@
+import struct
+import time
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+##################################
+# FONTES DE FRAMES (CÂMERA, GRAVAÇÃO, REPLAY)
+##################################
+
+# Arquivo de sessão: cabeçalho + registros (timestamp em s desde o início, tamanho, JPEG)
+RECORDING_MAGIC = b"MOODREC1"
+RECORDING_SUFFIX = ".moodrec"
+_RECORD_HEADER = struct.Struct("<dI")
+
+
+class FrameSource:
+    """
+    Fonte de frames BGR com a mesma interface usada do cv2.VideoCapture
+    (isOpened, read, release), para o loop de detecção não depender da webcam.
+    """
+
+    def isOpened(self) -> bool:
+        raise NotImplementedError
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        raise NotImplementedError
+
+    def timestamp(self) -> Optional[float]:
+        """Tempo gravado (s desde o início) do último frame lido; None em fontes ao vivo."""
+        return None
+
+    def release(self):
+        pass
+
+
+class CaptureSource(FrameSource):
+    """Webcam (índice) ou arquivo de vídeo, via cv2.VideoCapture."""
+
+    def __init__(self, device: Union[int, str] = 0):
+        self._capture = cv2.VideoCapture(device)
+
+    def isOpened(self) -> bool:
+        return self._capture.isOpened()
+
+    def read(self):
+        return self._capture.read()
+
+    def release(self):
+        self._capture.release()
+
+
+class RecordingSource(FrameSource):
+    """
+    Repassa os frames de outra fonte e grava cada um, comprimido em JPEG, num
+    arquivo de sessão (.moodrec) que o ReplaySource reproduz depois.
+    """
+
+    def __init__(self, source: FrameSource, path: Union[str, Path], quality: int = 85):
+        self._source = source
+        self._params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        self._file: BinaryIO = open(path, "wb")
+        self._file.write(RECORDING_MAGIC)
+        self._start: Optional[float] = None
+        self.frames = 0
+
+    def isOpened(self) -> bool:
+        return self._source.isOpened()
+
+    def read(self):
+        ok, frame = self._source.read()
+        if ok:
+            now = time.perf_counter()
+            if self._start is None:
+                self._start = now
+            encoded, data = cv2.imencode(".jpg", frame, self._params)
+            if encoded:
+                self._file.write(_RECORD_HEADER.pack(now - self._start, len(data)))
+                self._file.write(data.tobytes())
+                self.frames += 1
+        return ok, frame
+
+    def timestamp(self) -> Optional[float]:
+        return self._source.timestamp()
+
+    def release(self):
+        self._source.release()
+        if not self._file.closed:
+            self._file.close()
+
+
+class ReplaySource(FrameSource):
+    """
+    Reproduz um arquivo de sessão. Com realtime=True, respeita os intervalos
+    gravados (como a câmera original); com realtime=False, entrega os frames o
+    mais rápido possível. loop=True recomeça do início ao chegar ao fim.
+    """
+
+    def __init__(self, path: Union[str, Path], realtime: bool = True, loop: bool = False):
+        self._file: BinaryIO = open(path, "rb")
+        if self._file.read(len(RECORDING_MAGIC)) != RECORDING_MAGIC:
+            self._file.close()
+            raise ValueError(f"Arquivo de sessão inválido: {path}")
+        self.realtime = realtime
+        self.loop = loop
+        self._clock_start: Optional[float] = None
+        self._offset = 0.0  # soma das durações das voltas anteriores (loop)
+        self._last_timestamp = 0.0
+        self._frame_timestamp: Optional[float] = None
+        self.frames = 0
+
+    def isOpened(self) -> bool:
+        return not self._file.closed
+
+    def _next_record(self) -> Optional[Tuple[float, bytes]]:
+        header = self._file.read(_RECORD_HEADER.size)
+        if len(header) < _RECORD_HEADER.size:
+            if not self.loop or self.frames == 0:
+                return None
+            self._file.seek(len(RECORDING_MAGIC))
+            self._offset += self._last_timestamp
+            return self._next_record()
+        timestamp, size = _RECORD_HEADER.unpack(header)
+        data = self._file.read(size)
+        if len(data) < size:
+            return None
+        self._last_timestamp = timestamp
+        return self._offset + timestamp, data
+
+    def read(self):
+        if self._file.closed:
+            return False, None
+        record = self._next_record()
+        if record is None:
+            return False, None
+        timestamp, data = record
+
+        if self.realtime:
+            now = time.perf_counter()
+            if self._clock_start is None:
+                self._clock_start = now - timestamp
+            delay = self._clock_start + timestamp - now
+            if delay > 0:
+                time.sleep(delay)
+
+        self.frames += 1
+        self._frame_timestamp = timestamp
+        return True, cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    def timestamp(self) -> Optional[float]:
+        return self._frame_timestamp
+
+    def release(self):
+        self._file.close()
+
+
+def open_frame_source(spec: Union[int, str] = 0, realtime: bool = True, record_path: Optional[str] = None) -> FrameSource:
+    """
+    Abre uma fonte a partir de uma especificação: índice da webcam ("0"),
+    arquivo de sessão (.moodrec, reproduzido) ou arquivo de vídeo. Com
+    record_path, a sessão também é gravada nesse arquivo.
+    """
+    spec = str(spec)
+    if spec.isdigit():
+        source: FrameSource = CaptureSource(int(spec))
+    elif spec.endswith(RECORDING_SUFFIX):
+        source = ReplaySource(spec, realtime=realtime)
+    else:
+        source = CaptureSource(spec)
+
+    if record_path:
+        source = RecordingSource(source, record_path)
+    return source
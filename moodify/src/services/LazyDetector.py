@@ -0,0 +1,37 @@
+import sys
+import threading
+from typing import Any, Dict
+
+##################################
+# ACESSO PREGUIÇOSO AO DETECTOR
+##################################
+
+# O stack de detecção (cv2, torch, torchvision) custa segundos e centenas de MB
+# no import. O web tier só o importa na primeira detecção (ou no aquecimento).
+_DETECTOR_MODULE = __name__.rsplit(".", 1)[0] + ".MoodDetector"
+
+
+def get_mood_detector():
+    """
+    Retorna o singleton MoodDetectorService, importando o módulo no primeiro uso.
+    Bloqueante na primeira chamada: em código async, chame via executor.
+    """
+    from .MoodDetector import mood_detector
+
+    return mood_detector
+
+
+def readiness() -> Dict[str, Any]:
+    # Não força (nem espera) o import só para responder o probe
+    module = sys.modules.get(_DETECTOR_MODULE)
+    detector = getattr(module, "mood_detector", None)
+    if detector is None:
+        state = "importing" if module is not None else "idle"
+        return {"ready": False, "state": state, "models": {}, "face_detector": "pending", "warmed_up": False}
+    return detector.readiness()
+
+
+def start_background_warm_up():
+    """Importa, carrega e aquece o detector numa thread em background."""
+    thread = threading.Thread(target=lambda: get_mood_detector().warm_up(), name="mood-warm-up", daemon=True)
+    thread.start()
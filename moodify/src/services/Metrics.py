@@ -0,0 +1,227 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+##################################
+# MÉTRICAS (HISTOGRAMAS E CONTADORES)
+##################################
+
+# Limites em segundos: de 0,5 ms (Haar em ROI) a 5 s (ensemble grande em CPU lenta)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+class _Sharded:
+    """
+    Base das métricas escritas no hot path. Cada thread escreve no seu próprio
+    shard (criado na primeira escrita, único momento com lock); a leitura soma os
+    shards. Assim observe()/inc() não usam lock nem criam objetos além do float
+    do valor.
+
+    Threads vêm e vão (workers do threadpool, captura/inferência de cada sessão):
+    na leitura, os shards de threads que já terminaram são somados num total
+    "aposentado" e descartados, para a memória não crescer com o número de threads.
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.help = help_text
+        self.labels = dict(labels or {})
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, list]] = []
+        self._retired = self._new_shard()
+        self._shards_lock = threading.Lock()
+
+    def _new_shard(self) -> list:
+        raise NotImplementedError
+
+    def _shard(self) -> list:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+            with self._shards_lock:
+                self._shards.append((threading.current_thread(), shard))
+            self._local.shard = shard
+            return shard
+
+    def _collect(self) -> List[list]:
+        """Shards para leitura: o total aposentado + os das threads vivas."""
+        with self._shards_lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    # A thread terminou, então o shard não recebe mais escritas
+                    for index, value in enumerate(shard):
+                        self._retired[index] += value
+            self._shards = live
+            return [list(self._retired)] + [shard for _, shard in live]
+
+
+class Counter(_Sharded):
+    def _new_shard(self) -> list:
+        return [0]
+
+    def inc(self, amount: int = 1):
+        self._shard()[0] += amount
+
+    @property
+    def value(self) -> int:
+        return sum(shard[0] for shard in self._collect())
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels)} {self.value}"]
+
+
+class Histogram(_Sharded):
+    """Histograma de latências em buckets fixos (formato Prometheus, cumulativo na leitura)."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Optional[Dict[str, str]] = None,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        # Antes do super().__init__: _new_shard usa os limites
+        self._bounds = tuple(buckets)
+        super().__init__(name, help_text, labels)
+
+    def _new_shard(self) -> list:
+        # [contagem por bucket..., +Inf, soma]
+        return [0] * (len(self._bounds) + 1) + [0.0]
+
+    def observe(self, value: float):
+        shard = self._shard()
+        shard[bisect_left(self._bounds, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        counts = [0] * (len(self._bounds) + 1)
+        total = 0.0
+        for shard in self._collect():
+            for index in range(len(counts)):
+                counts[index] += shard[index]
+            total += shard[-1]
+        return counts, total
+
+    def render(self) -> List[str]:
+        counts, total = self.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self._bounds + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, ('le', le))} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labels)} {total}")
+        lines.append(f"{self.name}_count{_format_labels(self.labels)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Valor lido só na coleta (ex.: contadores que já existem em outro objeto)."""
+
+    def __init__(self, name: str, help_text: str, kind: str, fn: Callable[[], float], labels=None):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labels = dict(labels or {})
+        self._fn = fn
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels)} {self._fn()}"]
+
+
+class MetricsRegistry:
+    """Registro das métricas do processo, renderizado no formato texto do Prometheus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, list] = {}
+        self._kinds: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric, kind: str):
+        with self._lock:
+            self._kinds.setdefault(metric.name, (kind, metric.help))
+            self._metrics.setdefault(metric.name, []).append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Optional[Dict[str, str]] = None) -> Counter:
+        return self._register(Counter(name, help_text, labels), "counter")
+
+    def histogram(
+        self, name: str, help_text: str, labels: Optional[Dict[str, str]] = None, buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets), "histogram")
+
+    def callback(self, name: str, help_text: str, kind: str, fn: Callable[[], float], labels=None) -> CallbackMetric:
+        return self._register(CallbackMetric(name, help_text, kind, fn, labels), kind)
+
+    def labeled_histograms(self, name: str, help_text: str, label: str) -> Callable[[str], Histogram]:
+        """Retorna uma função que cria (uma vez) e devolve o histograma de cada valor do label."""
+        cache: Dict[str, Histogram] = {}
+        create_lock = threading.Lock()
+
+        def get(value: str) -> Histogram:
+            histogram = cache.get(value)
+            if histogram is None:
+                with create_lock:
+                    histogram = cache.get(value)
+                    if histogram is None:
+                        histogram = cache[value] = self.histogram(name, help_text, {label: value})
+            return histogram
+
+        return get
+
+    def render(self) -> str:
+        with self._lock:
+            groups = [(name, list(metrics), self._kinds[name]) for name, metrics in self._metrics.items()]
+        lines = []
+        for name, metrics, (kind, help_text) in groups:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for metric in metrics:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+##################################
+# MÉTRICAS DO PIPELINE DE DETECÇÃO
+##################################
+
+CAPTURE_SECONDS = REGISTRY.histogram("mood_capture_seconds", "Tempo de leitura de um frame da fonte (câmera/replay)")
+FACE_DETECTION_SECONDS = REGISTRY.histogram("mood_face_detection_seconds", "Tempo de uma chamada ao detectMultiScale")
+PREPROCESS_SECONDS = REGISTRY.histogram("mood_preprocess_seconds", "Tempo de pré-processamento de um batch de faces")
+ENSEMBLE_SECONDS = REGISTRY.histogram("mood_ensemble_seconds", "Tempo de uma chamada ao ensemble (membros + TTA)")
+TTA_SECONDS = REGISTRY.histogram("mood_tta_seconds", "Tempo do TTA fora dos forwards (flip, concatenação e médias)")
+MODEL_FORWARD_SECONDS = REGISTRY.labeled_histograms(
+    "mood_model_forward_seconds", "Tempo do forward de um membro do ensemble (\"all\": todos juntos)", "member"
+)
+FRAME_SECONDS = REGISTRY.histogram("mood_frame_seconds", "Tempo total de detecção de um frame")
+# Buckets inteiros: uma linha por número de membros (ensembles maiores caem em +Inf)
+CASCADE_MEMBERS_USED = REGISTRY.histogram(
+    "mood_cascade_members_used", "Membros do ensemble avaliados por face na cascata de saída antecipada",
+    buckets=tuple(range(1, 17)),
+)
+FACES_DETECTED = REGISTRY.counter("mood_faces_detected_total", "Faces encontradas pelo detector")
+FACES_CLASSIFIED = REGISTRY.counter("mood_faces_classified_total", "Faces enviadas ao ensemble")
+RESULT_CACHE_HITS = REGISTRY.counter("mood_result_cache_hits_total", "Recortes servidos pelo cache de resultados")
+RESULT_CACHE_MISSES = REGISTRY.counter(
+    "mood_result_cache_misses_total", "Recortes que não estavam no cache de resultados"
+)
+FRAMES_DROPPED_CAMERA = REGISTRY.counter(
+    "mood_frames_dropped_total", "Frames descartados antes de serem processados", {"source": "camera"}
+)
+FRAMES_DROPPED_WEBSOCKET = REGISTRY.counter(
+    "mood_frames_dropped_total", "Frames descartados antes de serem processados", {"source": "websocket"}
+)
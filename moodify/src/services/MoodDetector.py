@@ -4,18 +4,93 @@ import torch.nn as nn
 import torch.nn.functional as F
 import numpy as np
 import os
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from dotenv import load_dotenv
 import torchvision.models as models
-from torchvision import transforms
-from typing import List, Optional
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+from typing import Any, Callable, Dict, List, Optional, Union
+from .EnsembleEngine import CascadeEnsembleEngine, EnsembleEngine, OnnxEnsembleEngine
+from .ShardedEngine import ShardedEnsembleEngine
+from .BatchingServer import MicroBatcher
+from .DetectionExecutor import DetectionExecutor
+from .Quantization import QUANTIZED_SUFFIX, load_quantized
+from .FaceTracker import FaceTracker
+from .FrameSource import FrameSource, ReplaySource, open_frame_source
+from .FramePipeline import AdaptiveSkipPolicy, CaptureThread, LatestFrameBuffer
+from .ResultCache import ResultCache
+from .Metrics import (
+    FACE_DETECTION_SECONDS,
+    FACES_CLASSIFIED,
+    FACES_DETECTED,
+    FRAME_SECONDS,
+    PREPROCESS_SECONDS,
+    REGISTRY,
+)
+from .MoodSmoother import MoodSmoother
+from .Preprocessing import IMAGENET_MEAN, IMAGENET_STD, FacePreprocessor
+
+load_dotenv()
 
 # Configuração
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+# Modelos INT8 só rodam em CPU
+USE_QUANTIZED = os.getenv("MOOD_QUANTIZED", "0") == "1"
+# Engine de inferência: "torch" (eager), "onnx" (ONNX Runtime) ou "sharded"
+# (membros fp32 distribuídos em processos, só CPU)
+ENGINE = os.getenv("MOOD_ENGINE", "torch").lower()
+ORT_INTRA_OP_THREADS = int(os.getenv("MOOD_ORT_INTRA_OP_THREADS", "0"))
+ORT_INTER_OP_THREADS = int(os.getenv("MOOD_ORT_INTER_OP_THREADS", "0"))
+# torch.compile do ensemble (só engine torch, fp32)
+USE_COMPILE = os.getenv("MOOD_COMPILE", "0") == "1"
+COMPILE_BATCH_SIZES = [int(size) for size in os.getenv("MOOD_COMPILE_BATCH_SIZES", "1,4").split(",") if size.strip()]
+SHARDED_WORKERS = int(os.getenv("MOOD_SHARDED_WORKERS", "0"))
+DEVICE = "cuda" if torch.cuda.is_available() and not USE_QUANTIZED and ENGINE != "sharded" else "cpu"
 IMG_SIZE = 224
+# Entrada em 1 canal (cinza) com a duplicação RGB + normalização dobradas no conv1.
+# Só nos engines torch/sharded fp32; INT8 e ONNX continuam recebendo 3 canais.
+GRAYSCALE_INPUT = (
+    os.getenv("MOOD_GRAYSCALE_NATIVE", "1") == "1"
+    and (ENGINE == "sharded" or (ENGINE == "torch" and not USE_QUANTIZED))
+)
+INPUT_CHANNELS = 1 if GRAYSCALE_INPUT else 3
+BATCH_MAX_SIZE = int(os.getenv("MOOD_BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("MOOD_BATCH_MAX_WAIT_MS", "5"))
+DETECT_MAX_WORKERS = int(os.getenv("MOOD_DETECT_MAX_WORKERS", "2"))
+DETECT_TIMEOUT_S = float(os.getenv("MOOD_DETECT_TIMEOUT_S", "120"))
+LOAD_WORKERS = int(os.getenv("MOOD_LOAD_WORKERS", str(os.cpu_count() or 2)))
+MAX_FACES = int(os.getenv("MOOD_MAX_FACES", "8"))
+TRACK_DOWNSCALE_WIDTH = int(os.getenv("MOOD_TRACK_DOWNSCALE_WIDTH", "320"))
+TRACK_ROI_MARGIN = float(os.getenv("MOOD_TRACK_ROI_MARGIN", "0.5"))
+TRACK_FULL_SEARCH_EVERY = int(os.getenv("MOOD_TRACK_FULL_SEARCH_EVERY", "30"))
+CAMERA_INFERENCE_BUDGET = float(os.getenv("MOOD_CAMERA_INFERENCE_BUDGET", "0.5"))
+CAMERA_MAX_SKIP = int(os.getenv("MOOD_CAMERA_MAX_SKIP", "15"))
+RESULT_CACHE_SIZE = int(os.getenv("MOOD_RESULT_CACHE_SIZE", "64"))
+RESULT_CACHE_MAX_DISTANCE = int(os.getenv("MOOD_RESULT_CACHE_MAX_DISTANCE", "4"))
+RESULT_CACHE_BOX_TOLERANCE = float(os.getenv("MOOD_RESULT_CACHE_BOX_TOLERANCE", "0.1"))
+CASCADE_MARGIN = float(os.getenv("MOOD_CASCADE_MARGIN", "0"))
+CASCADE_MIN_MEMBERS = int(os.getenv("MOOD_CASCADE_MIN_MEMBERS", "1"))
+SMOOTHING_HALF_LIFE_S = float(os.getenv("MOOD_SMOOTHING_HALF_LIFE_S", "0.5"))
+STABLE_SECONDS = float(os.getenv("MOOD_STABLE_SECONDS", "1.5"))
+STABLE_MIN_CONFIDENCE = float(os.getenv("MOOD_STABLE_MIN_CONFIDENCE", "0.5"))
+AUTO_CONFIRM = os.getenv("MOOD_AUTO_CONFIRM", "1") == "1"
+FRAME_SOURCE = os.getenv("MOOD_FRAME_SOURCE", "0")
+REPLAY_REALTIME = os.getenv("MOOD_REPLAY_REALTIME", "1") == "1"
+RECORD_PATH = os.getenv("MOOD_RECORD_PATH") or None
+HEADLESS = os.getenv("MOOD_HEADLESS", "0") == "1"
+WARMUP_RUNS = int(os.getenv("MOOD_WARMUP_RUNS", "3"))
+FACE_DETECT_WORKERS = int(os.getenv("MOOD_FACE_DETECT_WORKERS", str(os.cpu_count() or 2)))
 
 # Caminhos
 BASE_DIR = Path(__file__).resolve().parent.parent
 ENSEMBLE_MODELS_DIR = BASE_DIR / "model" / "ensemble_models2"
+CONSOLIDATED_ENSEMBLE_FILE = "ensemble.pt"
+QUANTIZED_MODELS_DIR = BASE_DIR / "model" / "ensemble_models2_int8"
+ONNX_MODELS_DIR = BASE_DIR / "model" / "ensemble_models2_onnx"
+ONNX_ENSEMBLE_FILE = "ensemble.onnx"
+COMPILE_CACHE_DIR = Path(os.getenv("MOOD_COMPILE_CACHE_DIR", str(BASE_DIR / "model" / ".compile_cache")))
 
 # Labels do Modelo vs IDs do App
 MODEL_EMOTIONS = ["Raiva", "Nojo", "Medo", "Feliz", "Triste", "Surpresa", "Neutro"]
@@ -43,13 +118,45 @@ class SEBlock(nn.Module):
             nn.Linear(channels // reduction, channels, bias=False),
             nn.Sigmoid()
         )
+        # Ativado por prepare_for_inference: escala x no próprio buffer
+        self.inplace_scale = False
 
     def forward(self, x):
         b, c, _, _ = x.size()
         y = self.squeeze(x).view(b, c)
         y = self.excitation(y).view(b, c, 1, 1)
+        if self.inplace_scale:
+            return x.mul_(y)
         return x * y.expand_as(x)
 
+class GrayscaleStem(nn.Module):
+    """
+    Substitui o conv1 para receber a face em cinza (1 canal, pixels 0-255).
+
+    A entrada original é o mesmo cinza repetido em 3 canais e normalizado
+    ((g/255 - mean[c]) / std[c]). Como o conv é linear, os 3 canais viram um só
+    peso somado, e a parte constante (-mean/std, com o zero-padding no espaço
+    normalizado) vira um mapa de bias pré-calculado. Saída numericamente
+    equivalente ao conv1 original para entradas de img_size x img_size.
+    """
+
+    def __init__(self, conv: nn.Conv2d, mean, std, img_size: int):
+        super().__init__()
+        std = torch.tensor(std, dtype=conv.weight.dtype, device=conv.weight.device).view(1, 3, 1, 1)
+        mean = torch.tensor(mean, dtype=conv.weight.dtype, device=conv.weight.device).view(1, 3, 1, 1)
+
+        self.conv = nn.Conv2d(
+            1, conv.out_channels, conv.kernel_size, conv.stride, conv.padding, bias=False
+        ).to(conv.weight.device)
+        with torch.no_grad():
+            self.conv.weight.copy_((conv.weight / (255.0 * std)).sum(dim=1, keepdim=True))
+            constant = (-mean / std).expand(1, 3, img_size, img_size)
+            bias_map = F.conv2d(constant, conv.weight, conv.bias, conv.stride, conv.padding)
+        self.register_buffer("bias_map", bias_map)
+
+    def forward(self, x):
+        return self.conv(x).add_(self.bias_map)
+
 class SEResNet34Improved(nn.Module):
     def __init__(self, num_classes=7, dropout=0.3):
         super().__init__()
@@ -75,8 +182,58 @@ class SEResNet34Improved(nn.Module):
             nn.Dropout(dropout * 0.5),
             nn.Linear(256, num_classes)
         )
+        self.channels_last = False
+
+    @torch.no_grad()
+    def prepare_for_inference(self):
+        """
+        Converte o modelo treinado numa versão só para inferência, com as mesmas saídas:
+        funde conv+BN, remove Dropout, funde o BatchNorm1d do classificador na Linear
+        seguinte, usa channels_last e faz a escala do SE in-place.
+        Deve ser chamado depois do load_state_dict; o modelo não serve mais para treino.
+        """
+        self.eval()
+
+        self.conv1 = fuse_conv_bn_eval(self.conv1, self.bn1)
+        self.bn1 = nn.Identity()
+
+        for layer in (self.layer1, self.layer2, self.layer3, self.layer4):
+            res_layer, se_block = layer
+            for block in res_layer:
+                block.conv1 = fuse_conv_bn_eval(block.conv1, block.bn1)
+                block.bn1 = nn.Identity()
+                block.conv2 = fuse_conv_bn_eval(block.conv2, block.bn2)
+                block.bn2 = nn.Identity()
+                if block.downsample is not None:
+                    block.downsample = fuse_conv_bn_eval(block.downsample[0], block.downsample[1])
+            se_block.inplace_scale = True
+
+        # Dropout -> Linear -> ReLU -> BN1d -> Dropout -> Linear
+        _, hidden, relu, bn, _, output = self.classifier
+        bn_scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+        bn_shift = bn.bias - bn.running_mean * bn_scale
+        fused_output = nn.Linear(output.in_features, output.out_features).to(output.weight.device)
+        fused_output.weight.copy_(output.weight * bn_scale)
+        fused_output.bias.copy_(output.bias + output.weight @ bn_shift)
+        self.classifier = nn.Sequential(hidden, relu, fused_output)
+
+        self.to(memory_format=torch.channels_last)
+        self.channels_last = True
+        return self
+
+    def fold_grayscale_input(self, mean=IMAGENET_MEAN, std=IMAGENET_STD, img_size=IMG_SIZE):
+        """
+        Passa a receber (B, 1, H, W) com pixels cinza 0-255 em vez da imagem RGB
+        normalizada (ver GrayscaleStem). Chamar depois de prepare_for_inference.
+        """
+        self.conv1 = GrayscaleStem(self.conv1, mean, std, img_size)
+        if self.channels_last:
+            self.conv1.to(memory_format=torch.channels_last)
+        return self
 
     def forward(self, x):
+        if self.channels_last:
+            x = x.contiguous(memory_format=torch.channels_last)
         x = self.conv1(x)
         x = self.bn1(x)
         x = self.relu(x)
@@ -90,6 +247,13 @@ class SEResNet34Improved(nn.Module):
         x = self.classifier(x)
         return x
 
+def _load_checkpoint(path: Path):
+    try:
+        return torch.load(str(path), map_location=DEVICE, mmap=True, weights_only=True)
+    except RuntimeError:
+        # Checkpoints no formato legado (não-zip) não suportam mmap
+        return torch.load(str(path), map_location=DEVICE, weights_only=True)
+
 ##################################
 # SINGLETON PARA MODELOS
 ##################################
@@ -97,7 +261,19 @@ class SEResNet34Improved(nn.Module):
 class MoodDetectorService:
     _instance = None
     _models: List[nn.Module] = []
+    _engine: Optional[Union[EnsembleEngine, CascadeEnsembleEngine, OnnxEnsembleEngine]] = None
+    _batcher: Optional[MicroBatcher] = None
     _face_detector = None
+    _cascade_path: Optional[str] = None
+    _loaded = False
+    _load_lock = threading.Lock()
+    # Progresso da carga/aquecimento, exposto por readiness()
+    _status: Dict[str, Any] = {"state": "idle", "models": {}, "face_detector": "pending", "warmed_up": False}
+    _thread_local = threading.local()
+    _executor = DetectionExecutor(max_workers=DETECT_MAX_WORKERS)
+    _preprocessor = FacePreprocessor(IMG_SIZE, DEVICE, grayscale=GRAYSCALE_INPUT, max_buffer_size=BATCH_MAX_SIZE)
+    last_session_stats: Dict[str, Any] = {}
+    _face_pool = ThreadPoolExecutor(max_workers=FACE_DETECT_WORKERS, thread_name_prefix="mood-faces")
 
     def __new__(cls):
         if cls._instance is None:
@@ -105,25 +281,49 @@ class MoodDetectorService:
         return cls._instance
 
     def _load_models(self):
-        if self._models:
+        if self._loaded:
             return
+        # Várias sessões/workers podem pedir a carga ao mesmo tempo
+        with self._load_lock:
+            if not self._loaded:
+                self._status["state"] = "loading"
+                self._load_ensemble_and_detector()
+                # Sem modelos, tenta de novo na próxima chamada
+                self._loaded = self._engine is not None
+                self._status["state"] = "loaded" if self._loaded else "failed"
 
-        print(f"📦 Carregando modelos de: {ENSEMBLE_MODELS_DIR}")
-        model_files = sorted(list(ENSEMBLE_MODELS_DIR.glob("model_*.pth")))
-        
-        if not model_files:
-            print(f"❌ Nenhum modelo encontrado em {ENSEMBLE_MODELS_DIR}")
+    def _load_ensemble_and_detector(self):
+        if ENGINE == "onnx":
+            self._engine = self._load_onnx_engine()
+        elif ENGINE == "sharded":
+            self._engine = self._load_sharded_engine()
+        else:
+            if USE_QUANTIZED:
+                self._load_quantized_members()
+            else:
+                self._load_fp32_members()
+            if self._models and CASCADE_MARGIN > 0:
+                # Saída antecipada: membros em ordem, cada face para quando a margem basta
+                self._engine = CascadeEnsembleEngine(self._models, CASCADE_MARGIN, CASCADE_MIN_MEMBERS)
+                if USE_COMPILE:
+                    print("⚠ MOOD_COMPILE ignorado: a cascata de saída antecipada roda em modo eager")
+            elif self._models:
+                # Módulos TorchScript quantizados não podem ser empilhados pelo vmap; os fp32
+                # preparados (channels_last) também rodam no loop (ver EnsembleEngine)
+                self._engine = EnsembleEngine(self._models, vectorize=False if USE_QUANTIZED else None)
+                if USE_COMPILE and not USE_QUANTIZED:
+                    self._status["state"] = "compiling"
+                    self._engine.compile(COMPILE_BATCH_SIZES, (INPUT_CHANNELS, IMG_SIZE, IMG_SIZE), COMPILE_CACHE_DIR)
+
+        if self._engine is None:
             return
 
-        for model_path in model_files:
-            try:
-                model = SEResNet34Improved(num_classes=7, dropout=0.3).to(DEVICE)
-                model.load_state_dict(torch.load(str(model_path), map_location=DEVICE))
-                model.eval()
-                self._models.append(model)
-                print(f"✓ Modelo carregado: {model_path.name}")
-            except Exception as e:
-                print(f"❌ Erro ao carregar {model_path.name}: {e}")
+        # Fila compartilhada: pedidos de todas as sessões viram um único batch
+        self._batcher = MicroBatcher(
+            self._predict_batch,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+        )
 
         # Carrega detector de face
         cascade_path = os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
@@ -174,126 +374,663 @@ class MoodDetectorService:
                     break
         
         print(f"🔍 Carregando detector de face de: {cascade_path}")
-        self._face_detector = cv2.CascadeClassifier(cascade_path)
+        self._cascade_path = cascade_path
+        self._face_detector = self._get_face_detector()
+        self._status["face_detector"] = "failed" if self._face_detector.empty() else "loaded"
 
         if self._face_detector.empty():
             print(f"❌ ERRO CRÍTICO: Falha ao carregar CascadeClassifier de {cascade_path}")
             # Cria um detector dummy para não crashar imediatamente, mas vai falhar no uso
             # O ideal é tratar isso no loop principal checking if empty
 
+    def _load_fp32_members(self):
+        print(f"📦 Carregando modelos de: {ENSEMBLE_MODELS_DIR}")
+        start = time.perf_counter()
+        consolidated_path = ENSEMBLE_MODELS_DIR / CONSOLIDATED_ENSEMBLE_FILE
+
+        if consolidated_path.exists():
+            # Arquivo único com os state_dicts de todos os membros, mapeado em memória
+            checkpoint = _load_checkpoint(consolidated_path)
+            sources = [(name, lambda name=name: checkpoint[name]) for name in sorted(checkpoint)]
+        else:
+            sources = [
+                (model_path.name, lambda model_path=model_path: _load_checkpoint(model_path))
+                for model_path in sorted(ENSEMBLE_MODELS_DIR.glob("model_*.pth"))
+            ]
+
+        if not sources:
+            print(f"❌ Nenhum modelo encontrado em {ENSEMBLE_MODELS_DIR}")
+            return
+
+        for name, _ in sources:
+            self._status["models"][name] = "pending"
+
+        # Membros carregados em paralelo; a ordem do ensemble é preservada
+        with ThreadPoolExecutor(max_workers=max(1, min(LOAD_WORKERS, len(sources)))) as pool:
+            models = list(pool.map(lambda source: self._build_member(*source), sources))
+
+        self._models.extend(model for model in models if model is not None)
+        print(f"⏱  {len(self._models)} modelos carregados em {time.perf_counter() - start:.2f}s")
+
+    def _build_member(self, name: str, load_state: Callable[[], Dict[str, torch.Tensor]]) -> Optional[nn.Module]:
+        start = time.perf_counter()
+        self._status["models"][name] = "loading"
+        try:
+            # Construído em "meta": sem alocar nem inicializar pesos que serão sobrescritos
+            with torch.device("meta"):
+                model = SEResNet34Improved(num_classes=7, dropout=0.3)
+            model.load_state_dict(load_state(), assign=True)
+            model.to(DEVICE).prepare_for_inference()
+            if GRAYSCALE_INPUT:
+                model.fold_grayscale_input()
+        except Exception as e:
+            print(f"❌ Erro ao carregar {name}: {e}")
+            self._status["models"][name] = "failed"
+            return None
+
+        self._status["models"][name] = "loaded"
+        print(f"✓ Modelo carregado: {name} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+        return model
+
+    def _load_quantized_members(self):
+        print(f"📦 Carregando modelos INT8 de: {QUANTIZED_MODELS_DIR}")
+        model_files = sorted(list(QUANTIZED_MODELS_DIR.glob(f"model_*{QUANTIZED_SUFFIX}")))
+
+        if not model_files:
+            print(f"❌ Nenhum modelo INT8 encontrado em {QUANTIZED_MODELS_DIR}. Rode scripts/quantize_models.py")
+            return
+
+        for model_path in model_files:
+            self._status["models"][model_path.name] = "loading"
+            try:
+                self._models.append(load_quantized(model_path))
+                self._status["models"][model_path.name] = "loaded"
+                print(f"✓ Modelo INT8 carregado: {model_path.name}")
+            except Exception as e:
+                self._status["models"][model_path.name] = "failed"
+                print(f"❌ Erro ao carregar {model_path.name}: {e}")
+
+    def _load_onnx_engine(self) -> Optional[OnnxEnsembleEngine]:
+        # Prefere o grafo único (ensemble + TTA); senão, um grafo por membro
+        ensemble_path = ONNX_MODELS_DIR / ONNX_ENSEMBLE_FILE
+        model_files = [ensemble_path] if ensemble_path.exists() else sorted(ONNX_MODELS_DIR.glob("model_*.onnx"))
+
+        if not model_files:
+            print(f"❌ Nenhum modelo ONNX encontrado em {ONNX_MODELS_DIR}. Rode scripts/export_onnx.py")
+            return None
+
+        for model_path in model_files:
+            self._status["models"][model_path.name] = "loading"
+        try:
+            engine = OnnxEnsembleEngine(
+                model_files,
+                intra_op_threads=ORT_INTRA_OP_THREADS,
+                inter_op_threads=ORT_INTER_OP_THREADS,
+            )
+        except Exception as e:
+            print(f"❌ Erro ao carregar engine ONNX: {e}")
+            for model_path in model_files:
+                self._status["models"][model_path.name] = "failed"
+            return None
+
+        for model_path in model_files:
+            self._status["models"][model_path.name] = "loaded"
+
+        print(f"✓ Engine ONNX carregada: {', '.join(p.name for p in model_files)} ({engine.num_members} membros)")
+        return engine
+
+    def _load_sharded_engine(self) -> Optional[ShardedEnsembleEngine]:
+        # Os membros vão para os workers por pickle; módulos TorchScript INT8 não servem
+        if USE_QUANTIZED:
+            print("⚠ MOOD_QUANTIZED ignorado: o engine sharded usa os membros fp32")
+        self._load_fp32_members()
+        if not self._models:
+            return None
+        workers = SHARDED_WORKERS or min(len(self._models), os.cpu_count() or 1)
+        try:
+            return ShardedEnsembleEngine(
+                self._models,
+                workers=workers,
+                sample_shape=(INPUT_CHANNELS, IMG_SIZE, IMG_SIZE),
+                max_batch_size=BATCH_MAX_SIZE,
+                num_classes=len(MODEL_EMOTIONS),
+            )
+        except Exception as e:
+            print(f"❌ Erro ao iniciar os workers do ensemble: {e}")
+            # A próxima tentativa de carga recarrega os membros do zero
+            self._models.clear()
+            return None
+
+    def warm_up(self, runs: int = WARMUP_RUNS) -> bool:
+        """
+        Carrega ensemble + Haar e roda inferências dummy, para que a primeira detecção
+        real já encontre tudo carregado e aquecido. Retorna True se ficou pronto.
+        """
+        try:
+            self._load_models()
+            if self._engine is None:
+                return False
+
+            self._status["state"] = "warming_up"
+            dummy_gray = np.zeros((IMG_SIZE, IMG_SIZE), dtype=np.uint8)
+            if not self._face_detector.empty():
+                self._detect_faces(dummy_gray)
+            dummy_face = self._preprocess_face(dummy_gray)
+            for _ in range(runs):
+                self._predict(dummy_face)
+        except Exception as e:
+            self._status["state"] = "failed"
+            print(f"❌ Erro no aquecimento dos modelos: {e}")
+            return False
+
+        self._status["warmed_up"] = True
+        self._status["state"] = "ready"
+        print("🔥 Modelos aquecidos e prontos para inferência.")
+        return True
+
+    def readiness(self) -> Dict[str, Any]:
+        status = dict(self._status, models=dict(self._status["models"]))
+        # Pronto assim que o ensemble carrega, mesmo sem aquecimento (MOOD_WARMUP=0 ou
+        # carga preguiçosa depois de um aquecimento que falhou); warmed_up é separado
+        status["ready"] = status["state"] in ("loaded", "ready")
+        return status
+
+    def _get_face_detector(self):
+        # CascadeClassifier não é thread-safe: uma instância por thread
+        detector = getattr(self._thread_local, "face_detector", None)
+        if detector is None:
+            detector = cv2.CascadeClassifier(self._cascade_path)
+            self._thread_local.face_detector = detector
+        return detector
+
+    def _detect_faces(self, gray, min_size: Optional[tuple] = None, max_size: Optional[tuple] = None):
+        start = time.perf_counter()
+        faces = self._get_face_detector().detectMultiScale(
+            gray, 1.2, 5, minSize=min_size or (0, 0), maxSize=max_size or (0, 0)
+        )
+        FACE_DETECTION_SECONDS.observe(time.perf_counter() - start)
+        return faces
+
+    def create_tracker(self) -> FaceTracker:
+        """Rastreador de faces para uma sequência de frames (câmera, vídeo)."""
+        return FaceTracker(
+            self._detect_faces,
+            downscale_width=TRACK_DOWNSCALE_WIDTH,
+            roi_margin=TRACK_ROI_MARGIN,
+            full_search_every=TRACK_FULL_SEARCH_EVERY,
+            max_faces=MAX_FACES,
+        )
 
     def _preprocess_face(self, face_gray):
-        face_resized = cv2.resize(face_gray, (IMG_SIZE, IMG_SIZE))
-        face_rgb = cv2.cvtColor(face_resized, cv2.COLOR_GRAY2RGB)
-        face_normalized = face_rgb.astype("float32") / 255.0
-        
-        transform = transforms.Compose([
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-        ])
-        
-        return transform(face_normalized).unsqueeze(0).to(DEVICE)
+        return self._preprocess_faces([face_gray])
+
+    def _preprocess_faces(self, faces_gray: List[np.ndarray]) -> torch.Tensor:
+        # Batch escrito num buffer reaproveitado da thread atual (ver FacePreprocessor)
+        start = time.perf_counter()
+        batch = self._preprocessor(faces_gray)
+        PREPROCESS_SECONDS.observe(time.perf_counter() - start)
+        return batch
+
+    def _predict_batch(self, face_batch):
+        if self._engine is None:
+            return None
+
+        # Todos os modelos + TTA (Flip) em uma única chamada
+        return self._engine(face_batch)
+
+    def engine_stats(self) -> Dict[str, Any]:
+        """Estatísticas da engine (membros usados por face na cascata; vazio nas demais)."""
+        stats = getattr(self._engine, "stats", None)
+        return stats() if stats is not None else {}
 
     def _predict(self, face_tensor):
-        if not self._models:
+        if self._batcher is None:
             return None
+        return self._batcher.submit(face_tensor).result()[0]
 
-        all_probs = []
-        with torch.no_grad():
-            for model in self._models:
-                # TTA simples (Flip)
-                pred_normal = F.softmax(model(face_tensor), dim=1)
-                pred_flip = F.softmax(model(torch.flip(face_tensor, dims=[3])), dim=1)
-                avg_pred = (pred_normal + pred_flip) / 2
-                all_probs.append(avg_pred.cpu().numpy()[0])
-        
-        final_probs = np.array(all_probs).mean(axis=0)
-        return final_probs
+    async def predict_async(self, face_tensor):
+        """
+        Versão awaitable de _predict: enfileira no micro-batcher sem bloquear o event loop.
+        """
+        if self._batcher is None:
+            return None
+        # Outra corrotina na mesma thread pode reaproveitar o buffer do pré-processamento
+        probs = await asyncio.wrap_future(self._batcher.submit(face_tensor.clone()))
+        return probs[0]
+
+    def _describe_prediction(self, probs) -> Dict[str, Any]:
+        pred_idx = int(np.argmax(probs))
+        emotion_label = MODEL_EMOTIONS[pred_idx]
+        return {
+            "mood_id": APP_MOOD_IDS.get(emotion_label, "neutral"),
+            "emotion": emotion_label,
+            "confidence": float(probs[pred_idx]),
+            "probabilities": {
+                APP_MOOD_IDS[label]: float(p) for label, p in zip(MODEL_EMOTIONS, probs)
+            },
+        }
+
+    @staticmethod
+    def decode_frame(data: bytes) -> Optional[np.ndarray]:
+        """
+        Decodifica um frame comprimido (JPEG/PNG/WebP) enviado pelo navegador para BGR.
+        """
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        if buffer.size == 0:
+            return None
+        return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+    @staticmethod
+    def _sorted_boxes(faces) -> List[List[int]]:
+        # Maiores (mais próximas) primeiro, limitadas a MAX_FACES por imagem
+        boxes = sorted(([int(v) for v in face] for face in faces), key=lambda b: b[2] * b[3], reverse=True)
+        return boxes[:MAX_FACES]
+
+    @staticmethod
+    def _crop(gray, box):
+        x, y, w, h = box
+        return gray[y:y+h, x:x+w]
+
+    def _describe_faces(self, boxes: List[List[int]], probs: np.ndarray) -> Dict[str, Any]:
+        """
+        Monta o resultado de uma imagem: o mood de cada face em "faces" e, no topo,
+        o mood do grupo (média das probabilidades das faces) e a caixa da maior face.
+        """
+        result: Dict[str, Any] = {"face": True, "box": boxes[0]}
+        result.update(self._describe_prediction(probs.mean(axis=0)))
+        result["faces"] = [
+            dict(box=box, **self._describe_prediction(face_probs)) for box, face_probs in zip(boxes, probs)
+        ]
+        return result
+
+    def create_result_cache(self) -> ResultCache:
+        """Cache de resultados para uma sequência de frames (uma instância por sessão)."""
+        return ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_MAX_DISTANCE, RESULT_CACHE_BOX_TOLERANCE)
+
+    def _predict_crops(
+        self, crops: List[np.ndarray], boxes: List[List[int]], cache: Optional[ResultCache] = None
+    ) -> np.ndarray:
+        """
+        Probabilidades (N, 7) de recortes de faces. Com o cache da sessão, recortes
+        quase idênticos a um já avaliado saem dele; os demais vão ao ensemble em
+        batches de até BATCH_MAX_SIZE.
+        """
+        if cache is None or not cache.enabled:
+            return self._classify_crops(crops)
+
+        cached, hashes = cache.lookup_many(crops, boxes)
+        missing = [index for index, probs in enumerate(cached) if probs is None]
+        if missing:
+            fresh = self._classify_crops([crops[index] for index in missing])
+            for index, probs in zip(missing, fresh):
+                cached[index] = probs
+                cache.put(hashes[index], boxes[index], probs)
+        return np.stack(cached)
+
+    def _classify_crops(self, crops: List[np.ndarray]) -> np.ndarray:
+        # Em partes: o buffer de pré-processamento e o batch do ensemble ficam limitados
+        # a BATCH_MAX_SIZE faces, mesmo num pedido com dezenas de imagens
+        FACES_CLASSIFIED.inc(len(crops))
+        chunks = []
+        for start in range(0, len(crops), BATCH_MAX_SIZE):
+            face_batch = self._preprocess_faces(crops[start:start + BATCH_MAX_SIZE])
+            chunks.append(self._batcher.submit(face_batch).result())
+        return np.concatenate(chunks)
+
+    def _classify_faces(self, gray, boxes: List[List[int]], cache: Optional[ResultCache] = None) -> Dict[str, Any]:
+        # Todas as faces do frame num único batch
+        crops = [self._crop(gray, box) for box in boxes]
+        return self._describe_faces(boxes, self._predict_crops(crops, boxes, cache))
+
+    def create_smoother(self) -> MoodSmoother:
+        """Suavizador temporal para uma sequência de frames (uma instância por sessão)."""
+        return MoodSmoother(SMOOTHING_HALF_LIFE_S, STABLE_SECONDS, STABLE_MIN_CONFIDENCE)
+
+    def _smooth_result(self, result: Dict[str, Any], smoother: MoodSmoother, now: Optional[float] = None):
+        # Suaviza o mood do grupo e adiciona o resultado em "smoothed", com a estabilidade
+        group_probs = np.array([result["probabilities"][APP_MOOD_IDS[label]] for label in MODEL_EMOTIONS])
+        smoothed = self._describe_prediction(smoother.update(group_probs, now))
+        smoothed["stable"] = smoother.stable
+        smoothed["stability"] = smoother.stability
+        result["smoothed"] = smoothed
+        return result
+
+    def detect_frame(
+        self, frame, smoother: Optional[MoodSmoother] = None, cache: Optional[ResultCache] = None
+    ) -> Dict[str, Any]:
+        """
+        Detecta as faces de um frame BGR e retorna o mood de cada uma e do grupo.
+        Com um smoother (ver create_smoother), o resultado também traz em "smoothed"
+        o mood do grupo suavizado entre frames e se ele já está estável. Com o cache
+        da sessão (ver create_result_cache), faces repetidas não voltam ao ensemble.
+        Bloqueante: deve rodar num worker, fora do event loop.
+        """
+        start = time.perf_counter()
+        result = self.detect_images([frame], cache)[0]
+        if smoother is not None and result["face"]:
+            self._smooth_result(result, smoother)
+        FRAME_SECONDS.observe(time.perf_counter() - start)
+        return result
+
+    def find_faces(self, image: Union[bytes, np.ndarray]):
+        """
+        Primeiro estágio da detecção: decodifica (se preciso) e detecta as faces.
+        Retorna ((gray, caixas), None) ou (None, erro). Seguro entre threads.
+        """
+        frame = self.decode_frame(image) if isinstance(image, (bytes, bytearray)) else image
+        if frame is None:
+            return None, "invalid_image"
+
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = self._detect_faces(gray)
+        if len(faces) == 0:
+            return None, "no_face"
+
+        FACES_DETECTED.inc(len(faces))
+        return (gray, self._sorted_boxes(faces)), None
+
+    def detect_images(
+        self, images: List[Union[bytes, np.ndarray]], cache: Optional[ResultCache] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Detecta o mood de várias imagens (BGR, grayscale ou bytes comprimidos).
+        A detecção de faces roda em paralelo e as faces de todas as imagens passam
+        juntas pelo ensemble, em batches de até BATCH_MAX_SIZE. Retorna um resultado por imagem, na
+        mesma ordem, com o mood de cada face e o do grupo. Sem cache: imagens
+        independentes (lote, offline) sempre passam pelo ensemble.
+        """
+        self._load_models()
+        if self._engine is None or self._face_detector.empty():
+            return [{"face": False, "error": "detector_unavailable"} for _ in images]
+
+        return self.classify_detections(list(self._face_pool.map(self.find_faces, images)), cache)
+
+    def classify_detections(
+        self, detections: List[tuple], cache: Optional[ResultCache] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Segundo estágio da detecção: classifica juntas as faces de várias saídas de
+        find_faces (em batches de até BATCH_MAX_SIZE) e retorna um resultado por imagem, na mesma ordem.
+        """
+        crops, crop_boxes = [], []
+        for detection, _ in detections:
+            if detection is not None:
+                gray, boxes = detection
+                crops.extend(self._crop(gray, box) for box in boxes)
+                crop_boxes.extend(boxes)
+        probs = self._predict_crops(crops, crop_boxes, cache) if crops else None
+
+        results: List[Dict[str, Any]] = []
+        start = 0
+        for detection, error in detections:
+            if detection is None:
+                results.append({"face": False, "error": error})
+                continue
+            _, boxes = detection
+            results.append(self._describe_faces(boxes, probs[start:start + len(boxes)]))
+            start += len(boxes)
+
+        return results
 
-    def open_camera_and_detect(self) -> Optional[str]:
+    async def detect_async(
+        self,
+        timeout: Optional[float] = DETECT_TIMEOUT_S,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Optional[str]:
+        """
+        Executa open_camera_and_detect no executor dedicado sem bloquear o event loop.
+        Lança asyncio.TimeoutError se o timeout expirar; cancelar a task (ou sinalizar
+        cancel_event) fecha a câmera e retorna None.
+        """
+        return await self._executor.run(self.open_camera_and_detect, timeout, cancel_event)
+
+    def open_camera_and_detect(
+        self,
+        cancel_event: Optional[threading.Event] = None,
+        source: Optional[FrameSource] = None,
+        headless: Optional[bool] = None,
+        lockstep: Optional[bool] = None,
+    ) -> Optional[str]:
         """
         Abre a câmera, mostra detecção e retorna o ID do mood detectado ao pressionar SPACE/ENTER.
+        Se cancel_event for sinalizado, encerra a captura e retorna None.
+
+        source substitui a webcam (padrão: MOOD_FRAME_SOURCE, ver open_frame_source),
+        por exemplo um ReplaySource de uma sessão gravada. Com headless=True não há
+        janela: o loop termina quando o mood fica estável (MOOD_AUTO_CONFIRM) ou a
+        fonte acaba, e retorna o último mood detectado. As estatísticas da sessão
+        ficam em last_session_stats. Um erro na thread de inferência encerra a
+        sessão e é relançado aqui.
+
+        Com lockstep=True (padrão para um ReplaySource sem realtime), a captura espera
+        a inferência tomar cada frame e o ensemble roda em todo frame com faces, com os
+        tempos gravados: a mesma sessão processa sempre os mesmos frames.
         """
         self._load_models()
-        if not self._models:
+        if self._engine is None:
             print("Nenhum modelo disponível para detecção.")
             return None
 
-        cap = cv2.VideoCapture(0)
+        if self._face_detector.empty():
+             print("❌ Detector de face não foi carregado corretamente. Verifique a instalação do opencv-python.")
+             return None
+
+        headless = HEADLESS if headless is None else headless
+        cap = source if source is not None else open_frame_source(FRAME_SOURCE, REPLAY_REALTIME, RECORD_PATH)
         if not cap.isOpened():
             print("Não foi possível abrir a webcam.")
+            cap.release()
             return None
+        if lockstep is None:
+            lockstep = isinstance(cap, ReplaySource) and not cap.realtime
 
-        if self._face_detector.empty():
-             print("❌ Detector de face não foi carregado corretamente. Verifique a instalação do opencv-python.")
-             return None
+        if headless:
+            print("🎥 Captura iniciada (headless).")
+        else:
+            print("🎥 Câmera iniciada. Pressione ESPAÇO ou ENTER para confirmar o mood.")
+
+        # Captura, inferência e exibição em estágios separados: a thread de captura
+        # guarda só o frame mais novo, a de inferência sempre pega o mais recente e
+        # esta thread exibe cada frame com o último resultado publicado.
+        session_start = time.perf_counter()
+        capture = CaptureThread(cap, LatestFrameBuffer(lockstep=lockstep)).start()
+        stop_inference = threading.Event()
+        overlay: Dict[str, Any] = {"result": None, "error": None}
+        inference = threading.Thread(
+            target=self._camera_inference_loop,
+            args=(capture.buffer, overlay, stop_inference, lockstep),
+            name="mood-camera-inference",
+            daemon=True,
+        )
+        inference.start()
 
         detected_mood_id = None
-        frame_count = 0
-        current_emotion = "Aguardando..."
-        current_conf = 0.0
-        
-        print("🎥 Câmera iniciada. Pressione ESPAÇO ou ENTER para confirmar o mood.")
+        displayed_seq = 0
+        displayed = 0
+        source_ended = False
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    print("Detecção cancelada.")
+                    detected_mood_id = None
+                    break
 
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+                # A exibição só lê: quem toma (e processa) os frames é a inferência
+                item = capture.buffer.get_newer(displayed_seq, timeout=0.5, take=False)
+                if item is None:
+                    if capture.buffer.closed:
+                        source_ended = True
+                        break
+                    continue
+                displayed_seq, frame, _ = item
+                displayed += 1
 
-            # Processa a cada 3 frames para performance
-            if frame_count % 3 == 0:
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                faces = self._face_detector.detectMultiScale(gray, 1.2, 5)
-
-                # Se houver faces, pega a maior (mais próxima)
-                if len(faces) > 0:
-                    # Ordena por área (w * h), pega o maior
-                    faces = sorted(faces, key=lambda x: x[2]*x[3], reverse=True)
-                    x, y, w, h = faces[0]
-                    
-                    face_gray = gray[y:y+h, x:x+w]
-                    face_tensor = self._preprocess_face(face_gray)
-                    probs = self._predict(face_tensor)
-                    
-                    pred_idx = np.argmax(probs)
-                    emotion_label = MODEL_EMOTIONS[pred_idx]
-                    current_conf = probs[pred_idx] * 100
-                    current_emotion = emotion_label
-                    detected_mood_id = APP_MOOD_IDS.get(emotion_label, "neutral")
-
-                    # Desenha retângulo
-                    cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                    
-                    # Texto
-                    label = f"{emotion_label} {current_conf:.0f}%"
-                    cv2.putText(frame, label, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-
-            # Instruções na tela
-            cv2.putText(frame, "Pressione ESPACO para confirmar", (20, 40), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
-            cv2.imshow("Moodify - Deteccao de Emocao", frame)
-
-            key = cv2.waitKey(1) & 0xFF
-            # Space (32) or Enter (13)
-            if key == 32 or key == 13:
-                if detected_mood_id:
-                    print(f"Mood confirmado: {current_emotion} ({detected_mood_id})")
+                result = overlay["result"]
+                if result is not None:
+                    detected_mood_id = result["mood_id"]
+                    # Confirma sozinho quando o mood suavizado fica estável (em lockstep,
+                    # quem encerra é a inferência, no frame exato em que estabilizou)
+                    if AUTO_CONFIRM and not lockstep and result["stable"]:
+                        print(f"Mood estável confirmado: {result['emotion']} ({detected_mood_id})")
+                        break
+
+                if headless:
+                    continue
+
+                # A thread de inferência lê o mesmo frame: desenha numa cópia
+                frame = frame.copy()
+                if result is not None:
+                    self._draw_camera_overlay(frame, result)
+
+                # Instruções na tela
+                cv2.putText(frame, "Pressione ESPACO para confirmar", (20, 40),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+                cv2.imshow("Moodify - Deteccao de Emocao", frame)
+
+                key = cv2.waitKey(1) & 0xFF
+                # Space (32) or Enter (13)
+                if key == 32 or key == 13:
+                    if detected_mood_id:
+                        print(f"Mood confirmado: {result['emotion']} ({detected_mood_id})")
+                        break
+                    else:
+                        print("Nenhum rosto detectado para confirmar.")
+
+                # 'q' ou ESC para sair sem selecionar
+                if key == ord('q') or key == 27:
+                    detected_mood_id = None
                     break
-                else:
-                    print("Nenhum rosto detectado para confirmar.")
-            
-            # 'q' ou ESC para sair sem selecionar
-            if key == ord('q') or key == 27:
-                detected_mood_id = None
-                break
-            
-            frame_count += 1
-
-        cap.release()
-        cv2.destroyAllWindows()
+        finally:
+            if source_ended:
+                # Fonte finita (replay, vídeo): deixa a inferência terminar o último frame
+                inference.join(timeout=DETECT_TIMEOUT_S)
+            stop_inference.set()
+            capture.stop()
+            inference.join(timeout=2)
+            cap.release()
+            if not headless:
+                cv2.destroyAllWindows()
+
+        result = overlay["result"]
+        if source_ended and result is not None and result["mood_id"]:
+            detected_mood_id = result["mood_id"]
+        self.last_session_stats = {
+            "seconds": time.perf_counter() - session_start,
+            "frames_captured": capture.buffer.seq,
+            "frames_displayed": displayed,
+            "frames_processed": result["frames_processed"] if result else 0,
+            "inferences": result["inferences"] if result else 0,
+            "mood_id": detected_mood_id,
+            "lockstep": lockstep,
+        }
+        if overlay["error"] is not None:
+            raise overlay["error"]
         return detected_mood_id
 
+    def _camera_inference_loop(
+        self, buffer: LatestFrameBuffer, overlay: Dict[str, Any], stop: threading.Event, lockstep: bool = False
+    ):
+        """
+        Estágio de inferência da câmera: sempre processa o frame mais novo do buffer.
+        As caixas são rastreadas em todo frame processado; o ensemble roda quando a
+        AdaptiveSkipPolicy permite, conforme a latência medida. O mood exibido é o do
+        grupo suavizado pelo MoodSmoother. Cada estado novo é publicado em
+        overlay["result"] (substituição atômica do dict).
+
+        Em lockstep, o ensemble roda em todo frame com faces (a política depende do
+        relógio) e, com MOOD_AUTO_CONFIRM, o loop fecha o buffer assim que o mood fica
+        estável, para a sessão terminar sempre no mesmo frame.
+        """
+        tracker = self.create_tracker()
+        policy = AdaptiveSkipPolicy(budget=CAMERA_INFERENCE_BUDGET, max_skip=CAMERA_MAX_SKIP)
+        smoother = self.create_smoother()
+        cache = self.create_result_cache()
+        state: Dict[str, Any] = {
+            "boxes": [], "labels": [], "mood_id": None, "emotion": "Aguardando...", "confidence": 0.0,
+            "stable": False, "stability": 0.0, "frames_processed": 0, "inferences": 0,
+        }
+        seq, last_timestamp = 0, None
+        frames_since_inference = CAMERA_MAX_SKIP  # classifica a primeira face encontrada
+
+        try:
+            while not stop.is_set():
+                item = buffer.get_newer(seq, timeout=0.5)
+                if item is None:
+                    if buffer.closed:
+                        break
+                    continue
+                new_seq, frame, timestamp = item
+                if last_timestamp is not None:
+                    policy.record_frame_interval((timestamp - last_timestamp) / (new_seq - seq))
+                frames_since_inference += new_seq - seq
+                seq, last_timestamp = new_seq, timestamp
+                frame_start = time.perf_counter()
+
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                boxes = tracker.update(gray)
+                # Entre classificações, as caixas seguem as faces com o último rótulo
+                labels = state["labels"] if len(state["labels"]) == len(boxes) else []
+                state = dict(state, boxes=boxes, labels=labels, frames_processed=state["frames_processed"] + 1)
+
+                # Todas as faces num único batch; o mood confirmado é o do grupo
+                if boxes and (lockstep or policy.should_run(frames_since_inference)):
+                    start = time.perf_counter()
+                    frame_result = self._classify_faces(gray, boxes, cache)
+                    policy.record_inference(time.perf_counter() - start)
+                    frames_since_inference = 0
+                    smoothed = self._smooth_result(frame_result, smoother, timestamp)["smoothed"]
+                    state = dict(
+                        state,
+                        mood_id=smoothed["mood_id"],
+                        emotion=smoothed["emotion"],
+                        confidence=smoothed["confidence"] * 100,
+                        stable=smoothed["stable"],
+                        inferences=state["inferences"] + 1,
+                        stability=smoothed["stability"],
+                        labels=[f"{face['emotion']} {face['confidence'] * 100:.0f}%" for face in frame_result["faces"]],
+                    )
+
+                overlay["result"] = state
+                FRAME_SECONDS.observe(time.perf_counter() - frame_start)
+                if lockstep and AUTO_CONFIRM and state["stable"]:
+                    print(f"Mood estável confirmado: {state['emotion']} ({state['mood_id']})")
+                    buffer.close()
+                    break
+        except Exception as e:
+            print(f"❌ Erro na inferência da câmera: {e}")
+            # Repassado por open_camera_and_detect para quem chamou (ex.: a UI)
+            overlay["error"] = e
+        finally:
+            # Sem inferência, a captura (parada no put em lockstep) e a exibição
+            # precisam ver o buffer fechado para terminar
+            buffer.close()
+
+    @staticmethod
+    def _draw_camera_overlay(frame, state: Dict[str, Any]):
+        boxes, labels = state["boxes"], state["labels"]
+        for index, (x, y, w, h) in enumerate(boxes):
+            # Desenha retângulo
+            cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
+
+            # Texto
+            if labels:
+                cv2.putText(frame, labels[index], (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+
+        if len(boxes) > 1 and state["mood_id"]:
+            group_label = f"Grupo: {state['emotion']} {state['confidence']:.0f}%"
+            cv2.putText(frame, group_label, (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+
+        if state["mood_id"]:
+            # Barra de estabilidade do mood suavizado
+            width = int(200 * state["stability"])
+            cv2.rectangle(frame, (20, 100), (220, 110), (255, 255, 255), 1)
+            cv2.rectangle(frame, (20, 100), (20 + width, 110), (0, 255, 0), -1)
+
 # Instância global para ser importada
 mood_detector = MoodDetectorService()
 
+# Estado que já existe no serviço, lido só na coleta do /metrics
+REGISTRY.callback("mood_detector_ready", "1 se o ensemble está carregado (ver /ready)", "gauge",
+                  lambda: int(mood_detector.readiness()["ready"]))
+
@@ -0,0 +1,72 @@
+import math
+import time
+from typing import Optional
+
+import numpy as np
+
+##################################
+# SUAVIZAÇÃO TEMPORAL DO MOOD
+##################################
+
+
+class MoodSmoother:
+    """
+    Média móvel exponencial das probabilidades de uma sequência de frames, com um
+    sinal de estabilidade.
+
+    O peso de cada frame depende do tempo desde o anterior (meia-vida half_life_s),
+    então a suavização é a mesma se a inferência roda em todo frame ou a cada N.
+    O mood fica estável quando a classe mais provável da média não muda há
+    stable_seconds e a confiança suavizada é pelo menos min_confidence.
+    Não é seguro entre threads: use uma instância por sessão/conexão.
+    """
+
+    def __init__(self, half_life_s: float = 0.5, stable_seconds: float = 1.5, min_confidence: float = 0.5):
+        self.half_life_s = half_life_s
+        self.stable_seconds = stable_seconds
+        self.min_confidence = min_confidence
+        self.reset()
+
+    def reset(self):
+        self.probs: Optional[np.ndarray] = None
+        self._last_update: Optional[float] = None
+        self._top: Optional[int] = None
+        self._top_since: Optional[float] = None
+
+    def update(self, probs: np.ndarray, now: Optional[float] = None) -> np.ndarray:
+        """Incorpora as probabilidades de um frame e retorna a média suavizada."""
+        now = time.monotonic() if now is None else now
+        probs = np.asarray(probs, dtype=np.float32)
+        if self.probs is None or self.half_life_s <= 0:
+            self.probs = probs.copy()
+        else:
+            elapsed = max(0.0, now - self._last_update)
+            weight = 1.0 - math.pow(0.5, elapsed / self.half_life_s)
+            self.probs += weight * (probs - self.probs)
+        self._last_update = now
+
+        top = int(np.argmax(self.probs))
+        if top != self._top:
+            self._top, self._top_since = top, now
+        return self.probs
+
+    @property
+    def top(self) -> Optional[int]:
+        return self._top
+
+    @property
+    def stability(self) -> float:
+        """De 0 a 1: fração de stable_seconds com a mesma classe no topo."""
+        if self._top is None:
+            return 0.0
+        if self.stable_seconds <= 0:
+            return 1.0
+        return min(1.0, (self._last_update - self._top_since) / self.stable_seconds)
+
+    @property
+    def stable(self) -> bool:
+        return (
+            self._top is not None
+            and self.stability >= 1.0
+            and float(self.probs[self._top]) >= self.min_confidence
+        )
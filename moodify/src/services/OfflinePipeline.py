@@ -0,0 +1,171 @@
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cv2
+
+##################################
+# PIPELINE OFFLINE (VÍDEOS E PASTAS DE IMAGENS)
+##################################
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+# Item do pipeline: (metadados do frame, frame BGR ou bytes comprimidos)
+FrameItem = Tuple[Dict[str, Any], Any]
+
+_END = object()
+
+
+def video_frames(path: Path, every: int = 1) -> Iterator[FrameItem]:
+    """Frames de um arquivo de vídeo (um a cada `every`), com índice e timestamp."""
+    capture = cv2.VideoCapture(str(path))
+    if not capture.isOpened():
+        raise ValueError(f"Não foi possível abrir o vídeo: {path}")
+    try:
+        index = 0
+        while True:
+            # grab() avança sem decodificar os frames pulados
+            if not capture.grab():
+                break
+            if index % every == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                yield {"frame": index, "timestamp_ms": round(capture.get(cv2.CAP_PROP_POS_MSEC), 1)}, frame
+            index += 1
+    finally:
+        capture.release()
+
+
+def image_frames(directory: Path) -> Iterator[FrameItem]:
+    """
+    Imagens de uma pasta (recursivo, em ordem de nome). Lê só os bytes: a
+    decodificação fica para os workers de detecção, em paralelo.
+    """
+    paths = sorted(p for p in directory.rglob("*") if p.suffix.lower() in IMAGE_EXTENSIONS)
+    for index, path in enumerate(paths):
+        yield {"frame": index, "file": str(path.relative_to(directory))}, path.read_bytes()
+
+
+class OfflinePipeline:
+    """
+    Pontua uma sequência de frames em três estágios ligados por filas limitadas:
+
+    1. leitura: uma thread consome o iterável de frames (decodificação do vídeo);
+    2. detecção: face_workers threads rodam find_faces (decodificação + Haar);
+    3. ensemble: a thread que itera os resultados junta até batch_size frames e
+       classifica as faces juntas (classify_detections).
+
+    As filas têm tamanho fixo, então a memória não cresce com o tamanho da entrada.
+    Os resultados saem na ordem dos frames, um por frame, assim que ficam prontos.
+    """
+
+    def __init__(self, detector, face_workers: Optional[int] = None, batch_size: int = 16, queue_size: int = 32):
+        self._detector = detector
+        self.face_workers = face_workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+    def run(self, frames: Iterable[FrameItem]) -> Iterator[Dict[str, Any]]:
+        if not self._detector.warm_up():
+            raise RuntimeError("Detector indisponível: verifique os modelos e o detector de faces.")
+
+        decoded: "queue.Queue" = queue.Queue(self.queue_size)
+        detected: "queue.Queue" = queue.Queue(self.queue_size)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+
+        def put(target: "queue.Queue", item) -> bool:
+            # put com desistência, para as threads não travarem se o consumidor parar
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(source: "queue.Queue"):
+            while not stop.is_set():
+                try:
+                    return source.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return _END
+
+        def read():
+            try:
+                for position, (meta, frame) in enumerate(frames):
+                    if not put(decoded, (position, meta, frame)):
+                        return
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                for _ in range(self.face_workers):
+                    put(decoded, _END)
+
+        def detect():
+            try:
+                while True:
+                    item = get(decoded)
+                    if item is _END:
+                        break
+                    position, meta, frame = item
+                    try:
+                        detection = self._detector.find_faces(frame)
+                    except Exception as e:
+                        # Um frame com problema vira um resultado de erro, sem parar o pipeline
+                        detection = (None, str(e))
+                    if not put(detected, (position, meta, detection)):
+                        return
+            finally:
+                put(detected, _END)
+
+        threads = [threading.Thread(target=read, name="mood-offline-read", daemon=True)]
+        threads += [
+            threading.Thread(target=detect, name=f"mood-offline-detect-{i}", daemon=True)
+            for i in range(self.face_workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            yield from self._classify_stage(detected)
+            if errors:
+                raise errors[0]
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join(timeout=1)
+
+    def _classify_stage(self, detected: "queue.Queue") -> Iterator[Dict[str, Any]]:
+        # Os workers terminam fora de ordem: reordena num buffer limitado pelas filas
+        pending: Dict[int, Dict[str, Any]] = {}
+        next_position = 0
+        finished_workers = 0
+
+        while finished_workers < self.face_workers:
+            batch = []
+            item = detected.get()
+            while True:
+                if item is _END:
+                    finished_workers += 1
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size or finished_workers == self.face_workers:
+                    break
+                try:
+                    item = detected.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                results = self._detector.classify_detections([detection for _, _, detection in batch])
+                for (position, meta, _), result in zip(batch, results):
+                    pending[position] = dict(meta, **result)
+
+            while next_position in pending:
+                yield pending.pop(next_position)
+                next_position += 1
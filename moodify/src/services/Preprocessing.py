@@ -0,0 +1,86 @@
+import threading
+import cv2
+import numpy as np
+import torch
+from typing import List, Optional, Sequence
+
+##################################
+# PRÉ-PROCESSAMENTO DE FACES
+##################################
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+class FacePreprocessor:
+    """
+    Converte recortes de face em grayscale (uint8) num batch normalizado (B, 3, H, W).
+
+    Equivale a resize -> GRAY2RGB -> /255 -> Normalize, mas as constantes são
+    pré-calculadas (pixel * scale[c] + offset[c]) e o resultado é escrito direto
+    em buffers pré-alocados, reaproveitados entre chamadas.
+
+    Com grayscale=True, retorna (B, 1, H, W) com os pixels crus (0-255) em float,
+    para modelos com a normalização dobrada no conv1 (GrayscaleStem).
+
+    Os buffers são por thread: o tensor retornado é uma view que só é válida até a
+    próxima chamada na mesma thread (copie-o se precisar guardá-lo). Com
+    max_buffer_size, batches maiores usam buffers temporários, para um pedido
+    grande não deixar memória presa em cada thread.
+    """
+
+    def __init__(
+        self,
+        img_size: int,
+        device: str = "cpu",
+        mean: Sequence[float] = IMAGENET_MEAN,
+        std: Sequence[float] = IMAGENET_STD,
+        grayscale: bool = False,
+        max_buffer_size: Optional[int] = None,
+    ):
+        self.img_size = img_size
+        self.device = device
+        self.grayscale = grayscale
+        self.channels = 1 if grayscale else 3
+        self.max_buffer_size = max_buffer_size
+        std_array = np.asarray(std, dtype=np.float32)
+        self._scale = torch.from_numpy(1.0 / (255.0 * std_array)).view(1, 3, 1, 1)
+        self._offset = torch.from_numpy(-np.asarray(mean, dtype=np.float32) / std_array).view(1, 3, 1, 1)
+        self._local = threading.local()
+
+    def _allocate(self, capacity: int):
+        resized = np.empty((capacity, self.img_size, self.img_size), dtype=np.uint8)
+        output = torch.empty((capacity, self.channels, self.img_size, self.img_size), dtype=torch.float32)
+        return resized, output
+
+    def _buffers(self, batch_size: int):
+        if self.max_buffer_size is not None and batch_size > self.max_buffer_size:
+            return self._allocate(batch_size)
+        capacity = getattr(self._local, "capacity", 0)
+        if batch_size > capacity:
+            # Cresce em potências de 2 para não realocar a cada batch um pouco maior
+            capacity = 1 << (batch_size - 1).bit_length()
+            if self.max_buffer_size is not None:
+                capacity = min(capacity, self.max_buffer_size)
+            self._local.resized, self._local.output = self._allocate(capacity)
+            self._local.capacity = capacity
+        return self._local.resized, self._local.output
+
+    def __call__(self, faces_gray: List[np.ndarray]) -> torch.Tensor:
+        batch_size = len(faces_gray)
+        resized, output = self._buffers(batch_size)
+        size = (self.img_size, self.img_size)
+
+        for index, face_gray in enumerate(faces_gray):
+            cv2.resize(face_gray, size, dst=resized[index])
+
+        gray = torch.from_numpy(resized[:batch_size]).unsqueeze(1)
+        if self.grayscale:
+            batch = output[:batch_size].copy_(gray)
+        else:
+            # offset + pixel * scale, com broadcast do canal cinza para os 3 canais
+            batch = torch.addcmul(self._offset, gray, self._scale, out=output[:batch_size])
+
+        if self.device != "cpu":
+            return batch.to(self.device, non_blocking=True)
+        return batch
@@ -0,0 +1,52 @@
+import copy
+import torch
+import torch.nn as nn
+from pathlib import Path
+from typing import Iterable
+
+##################################
+# QUANTIZAÇÃO INT8 (CPU)
+##################################
+
+QUANTIZED_SUFFIX = "_int8.pt"
+
+
+def quantize_model(
+    model: nn.Module,
+    calibration_batches: Iterable[torch.Tensor],
+    backend: str = "x86",
+) -> nn.Module:
+    """
+    Quantiza estaticamente um SEResNet34Improved (convs, Linears do SEBlock e
+    classificador) em INT8 via FX graph mode, calibrando os observers com
+    batches de faces já pré-processadas.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    torch.backends.quantized.engine = backend
+    calibration_batches = iter(calibration_batches)
+    first_batch = next(calibration_batches)
+
+    float_model = copy.deepcopy(model).cpu().eval()
+    prepared = prepare_fx(float_model, get_default_qconfig_mapping(backend), (first_batch,))
+
+    with torch.no_grad():
+        prepared(first_batch)
+        for batch in calibration_batches:
+            prepared(batch)
+
+    return convert_fx(prepared)
+
+
+def save_quantized(model: nn.Module, path: Path, example_input: torch.Tensor):
+    # TorchScript congelado: carrega sem precisar refazer o grafo FX
+    traced = torch.jit.trace(model, example_input)
+    traced = torch.jit.freeze(traced)
+    torch.jit.save(traced, str(path))
+
+
+def load_quantized(path: Path) -> nn.Module:
+    model = torch.jit.load(str(path), map_location="cpu")
+    model.eval()
+    return model
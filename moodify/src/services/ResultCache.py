@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .Metrics import RESULT_CACHE_HITS, RESULT_CACHE_MISSES
+
+##################################
+# CACHE DE RESULTADOS POR HASH PERCEPTUAL
+##################################
+
+
+def dhash(face_gray: np.ndarray, hash_size: int = 8) -> int:
+    """
+    Difference hash de um recorte em grayscale: reduz para (hash_size + 1) x hash_size
+    e marca, para cada pixel, se ele é mais claro que o vizinho da direita.
+    Recortes quase iguais (ruído da câmera, pequenas variações de luz) têm hashes
+    a poucos bits de distância.
+    """
+    small = cv2.resize(face_gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class ResultCache:
+    """
+    LRU de probabilidades do ensemble indexado pelo dHash do recorte da face e pela
+    geometria da caixa. Um recorte conta como repetido se o hash está a no máximo
+    max_distance bits de uma entrada e a caixa difere menos de box_tolerance (fração
+    do tamanho) em posição e tamanho. A entrada não é atualizada no acerto, então
+    uma expressão que muda devagar acaba saindo do raio e é reavaliada.
+    Seguro entre threads.
+
+    Use uma instância por sessão (câmera, conexão WebSocket): entre imagens
+    independentes, recortes alinhados de pessoas diferentes podem ficar a poucos
+    bits de distância e receber o resultado um do outro.
+    """
+
+    def __init__(self, capacity: int = 64, max_distance: int = 4, box_tolerance: float = 0.1):
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.box_tolerance = box_tolerance
+        self._entries: "OrderedDict[int, Tuple[int, Sequence[int], np.ndarray]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def _box_matches(self, a: Sequence[int], b: Sequence[int]) -> bool:
+        tolerance = self.box_tolerance * max(a[2], a[3], 1)
+        return all(abs(int(va) - int(vb)) <= tolerance for va, vb in zip(a, b))
+
+    def get(self, face_hash: int, box: Sequence[int]) -> Optional[np.ndarray]:
+        with self._lock:
+            for entry_id, (entry_hash, entry_box, probs) in self._entries.items():
+                if bin(entry_hash ^ face_hash).count("1") <= self.max_distance and self._box_matches(entry_box, box):
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    RESULT_CACHE_HITS.inc()
+                    return probs
+            self.misses += 1
+            RESULT_CACHE_MISSES.inc()
+            return None
+
+    def put(self, face_hash: int, box: Sequence[int], probs: np.ndarray):
+        with self._lock:
+            self._entries[self._next_id] = (face_hash, list(box), probs)
+            self._next_id += 1
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def lookup_many(
+        self, faces_gray: List[np.ndarray], boxes: List[Sequence[int]]
+    ) -> Tuple[List[Optional[np.ndarray]], List[int]]:
+        """Retorna (probabilidades ou None por face, hashes) para um lote de recortes."""
+        hashes = [dhash(face) for face in faces_gray]
+        return [self.get(face_hash, box) for face_hash, box in zip(hashes, boxes)], hashes
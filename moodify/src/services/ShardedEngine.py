@@ -0,0 +1,208 @@
+import atexit
+import os
+import threading
+import time
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+import torch.nn as nn
+import torch.nn.functional as F
+
+from .Metrics import ENSEMBLE_SECONDS, MODEL_FORWARD_SECONDS, TTA_SECONDS
+
+##################################
+# ENSEMBLE DISTRIBUÍDO EM PROCESSOS
+##################################
+
+
+def _split_cores(workers: int) -> List[List[int]]:
+    # Núcleos disjuntos por worker (os que sobrarem vão para os primeiros)
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    if len(cores) < workers:
+        return [[] for _ in range(workers)]
+    return [cores[index::workers] for index in range(workers)]
+
+
+def _worker_main(worker_index: int, models: List[nn.Module], cores: List[int], inputs, outputs, conn):
+    """
+    Loop de um worker: espera o tamanho do batch pelo pipe, lê as faces do tensor
+    compartilhado `inputs`, roda seus membros com TTA e escreve a soma das
+    probabilidades na sua linha de `outputs`. Responde com o tempo de forward.
+    """
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(max(1, len(cores)))
+    for model in models:
+        model.eval()
+    conn.send("ready")
+
+    while True:
+        try:
+            batch_size = conn.recv()
+        except EOFError:
+            break
+        if batch_size is None:
+            break
+        try:
+            with torch.no_grad():
+                faces = inputs[:batch_size]
+                tta_batch = torch.cat([faces, torch.flip(faces, dims=[3])])
+                start = time.perf_counter()
+                total = None
+                for model in models:
+                    probs = F.softmax(model(tta_batch), dim=-1)
+                    total = probs if total is None else total.add_(probs)
+                elapsed = time.perf_counter() - start
+                outputs[worker_index, :batch_size].copy_(total.view(2, batch_size, -1).sum(dim=0))
+            conn.send(elapsed)
+        except Exception as e:
+            conn.send(f"{type(e).__name__}: {e}")
+
+
+class ShardedEnsembleEngine:
+    """
+    Executa os membros do ensemble em processos separados, cada um fixado num
+    conjunto disjunto de núcleos, para a latência do ensemble ser o máximo dos
+    shards em vez da soma dos membros.
+
+    Os modelos vão para os workers uma única vez (processos "spawn"; os pesos
+    ficam em memória compartilhada). A cada batch, as faces são copiadas para um
+    tensor de entrada compartilhado e só o tamanho do batch passa pelo pipe; cada
+    worker escreve a soma das probabilidades (membros x views do TTA) na sua linha
+    do tensor de saída compartilhado, e aqui é feita a média. Mesmo resultado do
+    EnsembleEngine. Batches maiores que max_batch_size são processados em partes.
+    """
+
+    def __init__(
+        self,
+        models: List[nn.Module],
+        workers: int,
+        sample_shape: Sequence[int],
+        max_batch_size: int = 16,
+        num_classes: int = 7,
+        ready_timeout_s: float = 120.0,
+    ):
+        self.num_members = len(models)
+        self.workers = max(1, min(workers, self.num_members))
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Membros distribuídos em rodízio: worker i fica com os membros i, i + W, ...
+        shards = [list(range(index, self.num_members, self.workers)) for index in range(self.workers)]
+        cores = _split_cores(self.workers)
+        self._inputs = torch.zeros(max_batch_size, *sample_shape).share_memory_()
+        self._outputs = torch.zeros(self.workers, max_batch_size, num_classes).share_memory_()
+        self._forward_seconds = [
+            MODEL_FORWARD_SECONDS("+".join(str(member) for member in shard)) for shard in shards
+        ]
+
+        context = mp.get_context("spawn")
+        self._connections = []
+        self._processes = []
+        for index, shard in enumerate(shards):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_worker_main,
+                args=(index, [models[member] for member in shard], cores[index], self._inputs, self._outputs, child_conn),
+                name=f"mood-shard-{index}",
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+
+        for index, conn in enumerate(self._connections):
+            if not conn.poll(ready_timeout_s) or conn.recv() != "ready":
+                self.close()
+                raise RuntimeError(f"Worker {index} do ensemble distribuído não iniciou")
+        atexit.register(self.close)
+
+        layout = ", ".join(
+            f"{shard} -> núcleos {core_set or 'todos'}" for shard, core_set in zip(shards, cores)
+        )
+        print(f"✓ Ensemble distribuído em {self.workers} processos: {layout}")
+
+    def _run_chunk(self, face_batch: torch.Tensor) -> Tuple[np.ndarray, float]:
+        batch_size = face_batch.shape[0]
+        self._inputs[:batch_size].copy_(face_batch)
+        sent = []
+        for conn in self._connections:
+            try:
+                conn.send(batch_size)
+                sent.append(True)
+            except OSError:
+                sent.append(False)
+
+        # Lê a resposta de todos os workers antes de qualquer erro, para os pipes não
+        # ficarem uma chamada defasados (e outputs não ser lido antes de ser escrito)
+        slowest = 0.0
+        errors = []
+        for conn, forward_seconds, was_sent in zip(self._connections, self._forward_seconds, sent):
+            reply = None
+            if was_sent:
+                try:
+                    reply = conn.recv()
+                except (EOFError, OSError):
+                    pass
+            if reply is None:
+                errors.append(None)
+                continue
+            if isinstance(reply, str):
+                errors.append(reply)
+                continue
+            forward_seconds.observe(reply)
+            slowest = max(slowest, reply)
+
+        if None in errors:
+            # Um worker morreu: sem ele o ensemble não tem todos os membros
+            self.close()
+            raise RuntimeError("Um worker do ensemble distribuído terminou inesperadamente; engine encerrada")
+        if errors:
+            raise RuntimeError(f"Falha num worker do ensemble distribuído: {errors[0]}")
+
+        probs = self._outputs[:, :batch_size].sum(dim=0) / (2 * self.num_members)
+        return probs.numpy(), slowest
+
+    def __call__(self, face_batch: torch.Tensor) -> np.ndarray:
+        """
+        Recebe um batch (B, C, H, W) e retorna as probabilidades médias (B, classes).
+        """
+        if self._closed:
+            raise RuntimeError("Ensemble distribuído encerrado")
+        start = time.perf_counter()
+        forward_total = 0.0
+        face_batch = face_batch.detach().cpu()
+        chunks = []
+        with self._lock:
+            for chunk in face_batch.split(self.max_batch_size):
+                probs, slowest = self._run_chunk(chunk)
+                chunks.append(probs)
+                forward_total += slowest
+        probs = np.concatenate(chunks)
+        elapsed = time.perf_counter() - start
+        TTA_SECONDS.observe(max(0.0, elapsed - forward_total))
+        ENSEMBLE_SECONDS.observe(elapsed)
+        return probs
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for conn in self._connections:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._connections:
+            conn.close()
@@ -0,0 +1,77 @@
+// Cliente do WebSocket /ws/mood: captura a webcam do navegador e envia frames JPEG.
+// Só envia um novo frame quando a resposta do anterior chega (o servidor ainda
+// descarta frames atrasados, mantendo apenas o mais recente).
+(function () {
+    class MoodStream {
+        constructor({ onResult, width = 320, quality = 0.7, url } = {}) {
+            const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
+            this.url = url || `${protocol}//${window.location.host}/ws/mood`;
+            this.onResult = onResult || (() => {});
+            this.width = width;
+            this.quality = quality;
+            this.video = document.createElement("video");
+            this.canvas = document.createElement("canvas");
+            this.inFlight = false;
+            this.running = false;
+        }
+
+        async start() {
+            this.stream = await navigator.mediaDevices.getUserMedia({ video: true });
+            this.video.srcObject = this.stream;
+            await this.video.play();
+
+            this.socket = new WebSocket(this.url);
+            this.socket.binaryType = "arraybuffer";
+            this.socket.onmessage = (event) => {
+                this.inFlight = false;
+                this.onResult(JSON.parse(event.data));
+            };
+            this.socket.onopen = () => {
+                this.running = true;
+                this.loop();
+            };
+            this.socket.onclose = () => this.stop();
+        }
+
+        loop() {
+            if (!this.running) {
+                return;
+            }
+            if (!this.inFlight && this.socket.readyState === WebSocket.OPEN) {
+                this.sendFrame();
+            }
+            requestAnimationFrame(() => this.loop());
+        }
+
+        sendFrame() {
+            const ratio = this.video.videoHeight / this.video.videoWidth || 0.75;
+            this.canvas.width = this.width;
+            this.canvas.height = Math.round(this.width * ratio);
+            this.canvas.getContext("2d").drawImage(this.video, 0, 0, this.canvas.width, this.canvas.height);
+            this.inFlight = true;
+            this.canvas.toBlob(
+                (blob) => {
+                    if (blob && this.socket.readyState === WebSocket.OPEN) {
+                        this.socket.send(blob);
+                    } else {
+                        this.inFlight = false;
+                    }
+                },
+                "image/jpeg",
+                this.quality
+            );
+        }
+
+        stop() {
+            this.running = false;
+            if (this.socket && this.socket.readyState <= WebSocket.OPEN) {
+                this.socket.close();
+            }
+            if (this.stream) {
+                this.stream.getTracks().forEach((track) => track.stop());
+            }
+        }
+    }
+
+    window.MoodStream = MoodStream;
+})();
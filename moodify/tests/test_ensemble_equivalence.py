@@ -0,0 +1,122 @@
+"""
+Equivalência numérica dos engines de inferência com o _predict original.
+
+A referência é o caminho de antes das otimizações: cada membro sem preparo,
+entrada RGB normalizada (cinza repetido em 3 canais, ToTensor + Normalize), TTA
+com flip e média das probabilidades, membro a membro. Os membros têm pesos e
+estatísticas de BatchNorm aleatórios (seed fixa), então nada depende de checkpoints.
+"""
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.services.MoodDetector import IMAGENET_MEAN, IMAGENET_STD, SEResNet34Improved
+from src.services.EnsembleEngine import CascadeEnsembleEngine, EnsembleEngine
+from src.services.Preprocessing import FacePreprocessor
+from src.services.ShardedEngine import ShardedEnsembleEngine
+
+# Entrada menor que os 224 do app, para o teste rodar rápido em CPU
+IMG_SIZE = 64
+MEMBERS = 3
+BATCH_SIZE = 4
+TOLERANCE = 1e-5
+
+
+def _random_member(seed: int) -> SEResNet34Improved:
+    torch.manual_seed(seed)
+    model = SEResNet34Improved(num_classes=7, dropout=0.3)
+    with torch.no_grad():
+        for module in model.modules():
+            if isinstance(module, (nn.BatchNorm1d, nn.BatchNorm2d)):
+                module.weight.uniform_(0.5, 1.5)
+                module.bias.uniform_(-0.2, 0.2)
+                module.running_mean.uniform_(-0.2, 0.2)
+                module.running_var.uniform_(0.5, 1.5)
+    return model.eval()
+
+
+def _prepared_member(seed: int, grayscale: bool) -> SEResNet34Improved:
+    model = _random_member(seed).prepare_for_inference()
+    if grayscale:
+        model.fold_grayscale_input(img_size=IMG_SIZE)
+    return model
+
+
+@pytest.fixture(scope="module")
+def crops():
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (size, size), dtype=np.uint8) for size in (48, 80, 64, 100)][:BATCH_SIZE]
+
+
+@pytest.fixture(scope="module")
+def rgb_batch(crops):
+    # Pré-processamento original: resize, GRAY2RGB, /255, Normalize
+    mean = np.asarray(IMAGENET_MEAN, dtype=np.float32)
+    std = np.asarray(IMAGENET_STD, dtype=np.float32)
+    faces = []
+    for crop in crops:
+        rgb = cv2.cvtColor(cv2.resize(crop, (IMG_SIZE, IMG_SIZE)), cv2.COLOR_GRAY2RGB).astype(np.float32) / 255.0
+        faces.append(((rgb - mean) / std).transpose(2, 0, 1))
+    return torch.from_numpy(np.stack(faces))
+
+
+@pytest.fixture(scope="module")
+def gray_batch(crops):
+    return FacePreprocessor(IMG_SIZE, grayscale=True)(crops).clone()
+
+
+@pytest.fixture(scope="module")
+def reference(rgb_batch):
+    # _predict original: membro a membro, TTA com flip, média das probabilidades
+    probs = []
+    with torch.no_grad():
+        for seed in range(MEMBERS):
+            model = _random_member(seed)
+            for view in (rgb_batch, torch.flip(rgb_batch, dims=[3])):
+                probs.append(F.softmax(model(view), dim=-1))
+    return torch.stack(probs).mean(dim=0).numpy()
+
+
+def test_preprocessor_matches_original_transform(crops, rgb_batch):
+    batch = FacePreprocessor(IMG_SIZE)(crops)
+    np.testing.assert_allclose(batch.numpy(), rgb_batch.numpy(), atol=1e-5)
+
+
+@pytest.mark.parametrize("vectorize", [True, False])
+def test_engine_with_original_members(rgb_batch, reference, vectorize):
+    engine = EnsembleEngine([_random_member(seed) for seed in range(MEMBERS)], vectorize=vectorize)
+    np.testing.assert_allclose(engine(rgb_batch), reference, atol=TOLERANCE)
+
+
+def test_engine_with_prepared_members(rgb_batch, reference):
+    engine = EnsembleEngine([_prepared_member(seed, grayscale=False) for seed in range(MEMBERS)])
+    np.testing.assert_allclose(engine(rgb_batch), reference, atol=TOLERANCE)
+
+
+def test_engine_with_grayscale_stem(gray_batch, reference):
+    engine = EnsembleEngine([_prepared_member(seed, grayscale=True) for seed in range(MEMBERS)])
+    np.testing.assert_allclose(engine(gray_batch), reference, atol=TOLERANCE)
+
+
+def test_cascade_at_full_depth(gray_batch, reference):
+    # Margem inalcançável: nenhuma face sai antes do último membro
+    members = [_prepared_member(seed, grayscale=True) for seed in range(MEMBERS)]
+    engine = CascadeEnsembleEngine(members, margin_threshold=2.0)
+    np.testing.assert_allclose(engine(gray_batch), reference, atol=TOLERANCE)
+    assert engine.stats()["members_used"][str(MEMBERS)] == BATCH_SIZE
+
+
+def test_sharded_engine(gray_batch, reference):
+    members = [_prepared_member(seed, grayscale=True) for seed in range(MEMBERS)]
+    engine = ShardedEnsembleEngine(members, workers=2, sample_shape=(1, IMG_SIZE, IMG_SIZE), max_batch_size=BATCH_SIZE)
+    try:
+        np.testing.assert_allclose(engine(gray_batch), reference, atol=TOLERANCE)
+    finally:
+        engine.close()